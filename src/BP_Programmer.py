@@ -1,20 +1,190 @@
 import sys
-import serial.tools.list_ports
+import time
+STARTUP_BEGIN = time.perf_counter()
+import os
+import argparse
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QGroupBox, QComboBox, QPushButton, QLabel, QLineEdit, 
                              QTableWidget, QTableWidgetItem, QHeaderView, QStatusBar,
                              QFileDialog, QProgressBar, QTextEdit, QSplitter,
                              QFrame, QSizePolicy, QFormLayout, QAction,
-                             QMenu, QToolBar, QAbstractItemView, QTabWidget)
+                             QMenu, QToolBar, QAbstractItemView, QTabWidget,
+                             QInputDialog)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
 from PyQt5.QtGui import QColor, QPalette, QIcon, QKeySequence, QFont
-import pyBusPirateLite
-import time
+import re
+import json
+import csv
+import bisect
+import zlib
+import random
+import lzma
+import binascii
+import hashlib
+import threading
+import abc
+import asyncio
+import socket
+import ipaddress
+import base64
+from concurrent.futures import ThreadPoolExecutor
+
+APP_STYLESHEET = """
+    QMainWindow, QWidget {
+        background-color: #2d2d30;
+        color: #d4d4d4;
+        font-family: 'Segoe UI', Arial, sans-serif;
+    }
+    QGroupBox {
+        border: 1px solid #3c3c3c;
+        border-radius: 8px;
+        margin-top: 1ex;
+        padding: 15px;
+        background-color: #2d2d30;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px;
+        color: #9cdcfe;
+    }
+    QLineEdit, QComboBox {
+        background-color: #333333;
+        color: #d4d4d4;
+        border: 1px solid #3c3c3c;
+        border-radius: 4px;
+        padding: 5px;
+        min-height: 28px;
+    }
+    QLineEdit:focus, QComboBox:focus {
+        border: 1px solid #0078d7;
+    }
+    QProgressBar {
+        border: 1px solid #3c3c3c;
+        border-radius: 4px;
+        background-color: #2d2d30;
+        text-align: center;
+    }
+    QProgressBar::chunk {
+        background-color: #0078d7;
+        border-radius: 4px;
+    }
+    QTextEdit {
+        background-color: #1e1e1e;
+        color: #d4d4d4;
+        border: 1px solid #3c3c3c;
+        border-radius: 4px;
+        font-family: 'Consolas', monospace;
+    }
+    QLabel {
+        color: #9cdcfe;
+    }
+    QTabWidget::pane {
+        border: none;
+        background-color: #2d2d30;
+    }
+    QTabBar::tab {
+        background-color: #2d2d30;
+        color: #d4d4d4;
+        padding: 8px 16px;
+        border-top-left-radius: 4px;
+        border-top-right-radius: 4px;
+        margin-right: 2px;
+    }
+    QTabBar::tab:selected {
+        background-color: #2d2d30;
+        border-bottom: 2px solid #0078d7;
+    }
+    QTabBar::tab:hover {
+        background-color: #3d3d3d;
+    }
+    QCheckBox {
+        color: #d4d4d4;
+        spacing: 5px;
+    }
+    QCheckBox::indicator {
+        width: 16px;
+        height: 16px;
+    }
+    QCheckBox::indicator:unchecked {
+        border: 1px solid #3c3c3c;
+        background: #333333;
+    }
+    QCheckBox::indicator:checked {
+        border: 1px solid #3c3c3c;
+        background: #0078d7;
+    }
+    HexEditor QToolBar {
+        background-color: #2d2d30;
+        border-bottom: 1px solid #2d2d30;
+        padding: 4px;
+    }
+    HexEditor QToolButton {
+        background-color: transparent;
+        color: #d4d4d4;
+        padding: 4px 8px;
+        border-radius: 4px;
+    }
+    HexEditor QToolButton:hover {
+        background-color: #2d2d30;
+    }
+    HexEditor QToolButton:pressed {
+        background-color: #3c3c3c;
+    }
+    HexEditor QSplitter::handle {
+        background-color: #2d2d30;
+    }
+    HexTableView, AsciiTableView {
+        background-color: #161616;
+        color: #d4d4d4;
+        border: none;
+        gridline-color: #2d2d30;
+        selection-background-color: #264f78;
+        selection-color: white;
+    }
+    HexTableView QHeaderView::section, AsciiTableView QHeaderView::section {
+        background-color: #2d2d30;
+        color: #9cdcfe;
+        padding: 4px;
+        border: none;
+        border-bottom: 1px solid #2d2d30;
+    }
+    ModernButton {
+        background-color: #0078d7;
+        color: white;
+        border: none;
+        border-radius: 4px;
+        padding: 8px 16px;
+        font-weight: bold;
+        min-height: 32px;
+    }
+    ModernButton:hover {
+        background-color: #1c97ea;
+    }
+    ModernButton:pressed {
+        background-color: #005a9e;
+    }
+    ModernButton:disabled {
+        background-color: #333344;
+        color: #888888;
+    }
+"""
 
 class HexEditor(QWidget):
+    compare_device_requested = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.buffer = bytearray()
+        self.search = BufferSearch()
+        self.highlighted = []
+        self.compare_data = None
+        self.diff = None
+        self.journal = EditJournal()
+        self.checksums = ChecksumState()
+        self.checksum_slot = None
+        self.block_map = BlockMap()
         self.setup_ui()
         
     def setup_ui(self):
@@ -25,25 +195,14 @@ class HexEditor(QWidget):
         self.toolbar = QToolBar()
         self.toolbar.setIconSize(QSize(16, 16))
         self.toolbar.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
-        self.toolbar.setStyleSheet("""
-            QToolBar {
-                background-color: #2d2d30;
-                border-bottom: 1px solid #2d2d30;
-                padding: 4px;
-            }
-            QToolButton {
-                background-color: transparent;
-                color: #d4d4d4;
-                padding: 4px 8px;
-                border-radius: 4px;
-            }
-            QToolButton:hover {
-                background-color: #2d2d30;
-            }
-            QToolButton:pressed {
-                background-color: #3c3c3c;
-            }
-        """)
+
+        self.undo_action = QAction(QIcon.fromTheme("edit-undo"), "Undo", self)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.setEnabled(False)
+
+        self.redo_action = QAction(QIcon.fromTheme("edit-redo"), "Redo", self)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.setEnabled(False)
 
         self.copy_action = QAction(QIcon.fromTheme("edit-copy"), "Copy", self)
         self.copy_action.setShortcut(QKeySequence.Copy)
@@ -60,14 +219,49 @@ class HexEditor(QWidget):
         self.fill_action.setMenu(self.fill_menu)
         
         self.clear_action = QAction(QIcon.fromTheme("edit-clear"), "Clear", self)
+
+        self.find_action = QAction(QIcon.fromTheme("edit-find"), "Find", self)
+        self.find_action.setShortcut(QKeySequence.Find)
+        self.find_action.setCheckable(True)
+
+        self.compare_action = QAction(QIcon.fromTheme("edit-copy"), "Compare", self)
+        self.compare_menu = QMenu()
+        self.compare_file = QAction("Compare with File...", self)
+        self.compare_device = QAction("Compare with Device", self)
+        self.compare_menu.addAction(self.compare_file)
+        self.compare_menu.addAction(self.compare_device)
+        self.compare_action.setMenu(self.compare_menu)
+
+        self.checksum_action = QAction(QIcon.fromTheme("document-properties"), "Checksum", self)
+        self.checksum_action.setCheckable(True)
+
+        self.goto_edit = QLineEdit()
+        self.goto_edit.setPlaceholderText("Go to 0x...")
+        self.goto_edit.setMaximumWidth(110)
+
+        self.prev_data_action = QAction(QIcon.fromTheme("go-up"), "Prev Data", self)
+        self.next_data_action = QAction(QIcon.fromTheme("go-down"), "Next Data", self)
         
+        self.toolbar.addAction(self.undo_action)
+        self.toolbar.addAction(self.redo_action)
         self.toolbar.addAction(self.copy_action)
         self.toolbar.addAction(self.paste_action)
         self.toolbar.addAction(self.fill_action)
         self.toolbar.addAction(self.clear_action)
+        self.toolbar.addAction(self.find_action)
+        self.toolbar.addAction(self.compare_action)
+        self.toolbar.addAction(self.checksum_action)
+        self.toolbar.addSeparator()
+        self.toolbar.addWidget(self.goto_edit)
+        self.toolbar.addAction(self.prev_data_action)
+        self.toolbar.addAction(self.next_data_action)
         
         main_layout.addWidget(self.toolbar)
 
+        self.search_bar = SearchBar()
+        self.search_bar.setVisible(False)
+        main_layout.addWidget(self.search_bar)
+
         self.hex_view = HexTableView()
         self.ascii_view = AsciiTableView()
 
@@ -81,468 +275,2887 @@ class HexEditor(QWidget):
         splitter.setStretchFactor(1, 1)
         splitter.setSizes([400, 400])
         splitter.setHandleWidth(1)
-        splitter.setStyleSheet("""
-            QSplitter::handle {
-                background-color: #2d2d30;
-            }
-        """)
 
         splitter.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
-        main_layout.addWidget(splitter, 1)  
-        
-        main_layout.addWidget(splitter)
+        self.minimap = BlockMapView(self.block_map)
+
+        view_layout = QHBoxLayout()
+        view_layout.setContentsMargins(0, 0, 0, 0)
+        view_layout.setSpacing(2)
+        view_layout.addWidget(splitter, 1)
+        view_layout.addWidget(self.minimap)
+        main_layout.addLayout(view_layout, 1)
+
+        self.compare_panel = ComparePanel()
+        self.compare_panel.setVisible(False)
+        main_layout.addWidget(self.compare_panel)
+
+        self.checksum_panel = ChecksumPanel()
+        self.checksum_panel.setVisible(False)
+        main_layout.addWidget(self.checksum_panel)
+
+        self.checksum_timer = QtCore.QTimer(self)
+        self.checksum_timer.setSingleShot(True)
+        self.checksum_timer.setInterval(150)
+        self.checksum_timer.timeout.connect(self.update_checksums)
 
         self.hex_view.itemChanged.connect(self.hex_data_changed)
         self.ascii_view.itemChanged.connect(self.ascii_data_changed)
         
+        self.undo_action.triggered.connect(self.undo)
+        self.redo_action.triggered.connect(self.redo)
         self.clear_action.triggered.connect(self.clear_data)
         self.fill_00.triggered.connect(lambda: self.fill_data(0x00))
         self.fill_ff.triggered.connect(lambda: self.fill_data(0xFF))
+
+        self.find_action.toggled.connect(self.toggle_search_bar)
+        self.search_bar.find_next_btn.clicked.connect(lambda: self.find_next(1))
+        self.search_bar.find_prev_btn.clicked.connect(lambda: self.find_next(-1))
+        self.search_bar.find_all_btn.clicked.connect(self.find_all)
+        self.search_bar.replace_btn.clicked.connect(self.replace_current)
+        self.search_bar.replace_all_btn.clicked.connect(self.replace_all)
+        self.search_bar.find_edit.returnPressed.connect(lambda: self.find_next(1))
+        self.search_bar.find_edit.textChanged.connect(self.search_changed)
+        self.search_bar.mode_combo.currentIndexChanged.connect(self.search_changed)
+
+        self.compare_file.triggered.connect(self.compare_with_file)
+        self.compare_device.triggered.connect(self.compare_device_requested.emit)
+        self.compare_panel.prev_btn.clicked.connect(lambda: self.next_difference(-1))
+        self.compare_panel.next_btn.clicked.connect(lambda: self.next_difference(1))
+        self.compare_panel.refresh_btn.clicked.connect(self.refresh_compare)
+        self.compare_panel.close_btn.clicked.connect(self.close_compare)
+        self.compare_panel.range_table.cellClicked.connect(self.show_difference)
+
+        self.checksum_action.toggled.connect(self.toggle_checksum_panel)
+        self.checksum_panel.scope_combo.currentIndexChanged.connect(self.update_checksums)
+        self.checksum_panel.embed_btn.clicked.connect(self.embed_checksum)
+        self.hex_view.itemSelectionChanged.connect(self.selection_changed)
+
+        self.goto_edit.returnPressed.connect(self.goto_address)
+        self.prev_data_action.triggered.connect(lambda: self.jump_to_data(-1))
+        self.next_data_action.triggered.connect(lambda: self.jump_to_data(1))
+        self.minimap.offset_selected.connect(self.goto_offset)
+        self.hex_view.verticalScrollBar().valueChanged.connect(self.update_minimap_viewport)
         
-    def load_data(self, data):
-        self.hex_view.load_data(data)
-        self.ascii_view.load_data(data)
+    def load_data(self, data, keep_history=False):
+        with TRACER.span("load", size=len(data)):
+            self.buffer = bytearray(data)
+            self.search.invalidate()
+            self.highlighted = []
+            self.diff = None
+            self.checksums.reset()
+            if not keep_history:
+                self.journal.clear()
+                self.checksum_slot = None
+            self.update_undo_actions()
+            self.hex_view.blockSignals(True)
+            self.ascii_view.blockSignals(True)
+            try:
+                with TRACER.span("render", size=len(data)):
+                    self.hex_view.load_data(self.buffer)
+                    self.ascii_view.load_data(self.buffer)
+            finally:
+                self.hex_view.blockSignals(False)
+                self.ascii_view.blockSignals(False)
+            self.block_map.load(self.buffer, keep_baseline=keep_history)
+            self.minimap.refresh()
+            self.update_minimap_viewport()
+            self.schedule_checksums()
         
     def get_data(self):
-        return self.hex_view.get_data()
+        with TRACER.span("get_data", size=len(self.buffer)):
+            return bytes(self.buffer)
+
+    def write_bytes(self, offset, data, record=True):
+        end = min(offset + len(data), len(self.buffer))
+        data = bytes(data[:end - offset])
+        if not data:
+            return
+        if record:
+            self.journal.record(offset, bytes(self.buffer[offset:end]), data)
+            self.update_undo_actions()
+        self.buffer[offset:end] = data
+        self.buffer_changed(offset, end)
+        self.hex_view.blockSignals(True)
+        self.ascii_view.blockSignals(True)
+        try:
+            self.hex_view.set_bytes(offset, data)
+            self.ascii_view.set_bytes(offset, data)
+        finally:
+            self.hex_view.blockSignals(False)
+            self.ascii_view.blockSignals(False)
         
     def hex_data_changed(self, item):
         if item.column() > 0:
-            row = item.row()
-            col = item.column() - 1
-            self.ascii_view.update_ascii_row(row)
+            idx = item.row() * 16 + item.column() - 1
+            if idx >= len(self.buffer):
+                return
+            try:
+                value = int(item.text(), 16)
+            except ValueError:
+                value = 0
+            value = value if 0 <= value <= 0xFF else 0
+            self.write_bytes(idx, bytes([value]))
+
+    def buffer_changed(self, start, end):
+        self.search.invalidate()
+        self.diff = None
+        self.checksums.invalidate(start, end)
+        self.schedule_checksums()
+        self.minimap.refresh(self.block_map.update(self.buffer, start, end))
             
     def ascii_data_changed(self, item):
-        if item.column() == 1:
-            row = item.row()
-            self.hex_view.update_hex_row(row)
+        if item.column() > 0:
+            idx = item.row() * 16 + item.column() - 1
+            text = item.text()
+            if idx >= len(self.buffer) or not text:
+                return
+            byte = self.buffer[idx]
+            if text == (chr(byte) if 32 <= byte <= 126 else "."):
+                return
+            self.write_bytes(idx, bytes([ord(text[0]) & 0xFF]))
             
     def clear_data(self):
-        for _ in range(2):
-            self.hex_view.clear_data()
-            self.ascii_view.clear_data()
+        self.fill_data(0x00)
         
     def fill_data(self, value):
-        for _ in range(2):
-            self.hex_view.fill_data(value)
-            self.ascii_view.fill_data(value)
+        self.write_bytes(0, bytes([value]) * len(self.buffer))
 
-class HexTableView(QTableWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setColumnCount(17)
-        self.setHorizontalHeaderLabels(["Address"] + [f"{i:02X}" for i in range(16)])
-        self.verticalHeader().setVisible(False)
-        self.setEditTriggers(QTableWidget.DoubleClicked | QTableWidget.EditKeyPressed)
-        self.setSelectionMode(QTableWidget.ContiguousSelection)
-        self.setShowGrid(False)
-        self.setFont(QtGui.QFont("Consolas", 10))
-        self.setAlternatingRowColors(True)
-        self.setStyleSheet("""
-            QTableWidget {
-                background-color: #161616;
-                color: #d4d4d4;
-                border: none;
-                gridline-color: #2d2d30;
-                selection-background-color: #264f78;
-                selection-color: white;
-            }
-            QHeaderView::section {
-                background-color: #2d2d30;
-                color: #9cdcfe;
-                padding: 4px;
-                border: none;
-                border-bottom: 1px solid #2d2d30;
-            }
-        """)
-        
-        header = self.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.Fixed)  
+    def undo(self):
+        group = self.journal.undo()
+        if group:
+            for offset, old, new in reversed(group):
+                self.write_bytes(offset, EditJournal.unpack(old), record=False)
+            self.select_range(group[0][0], group[0][0] + 1)
+        self.update_undo_actions()
 
-        self.setColumnWidth(0, 80)
-        for i in range(1, 17):
-            header.setSectionResizeMode(i, QHeaderView.Stretch)
+    def redo(self):
+        group = self.journal.redo()
+        if group:
+            for offset, old, new in group:
+                self.write_bytes(offset, EditJournal.unpack(new), record=False)
+            self.select_range(group[0][0], group[0][0] + 1)
+        self.update_undo_actions()
 
-        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
-        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+    def update_undo_actions(self):
+        self.undo_action.setEnabled(self.journal.can_undo())
+        self.redo_action.setEnabled(self.journal.can_redo())
 
-        palette = self.palette()
-        palette.setColor(QPalette.Base, QColor("#161616"))
-        palette.setColor(QPalette.AlternateBase, QColor("#2d2d30"))
-        self.setPalette(palette)
-        
-    def keyPressEvent(self, event):
-        if event.key() in (Qt.Key_Backspace, Qt.Key_Delete):
-            current_row = self.currentRow()
-            current_col = self.currentColumn()
+    def toggle_search_bar(self, visible):
+        self.search_bar.setVisible(visible)
+        if visible:
+            self.search_bar.find_edit.setFocus()
+            self.search_bar.find_edit.selectAll()
+        else:
+            self.clear_highlights()
 
-            if 1 <= current_col <= 16:
-                if event.key() == Qt.Key_Backspace:
-                    if current_col > 1:
-                        new_col = current_col - 1
-                        new_row = current_row
-                    else:
-                        if current_row > 0:
-                            new_row = current_row - 1
-                            new_col = 16
-                        else:
-                            new_row = 0
-                            new_col = 1
-                    self.setCurrentCell(new_row, new_col)
+    def search_changed(self):
+        self.search.invalidate()
+        self.search_bar.set_status("")
 
-                else:
-                    item = self.item(current_row, current_col)
-                    if item:
-                        item.setText("00")
-                        item.setForeground(QColor("#d4d4d4"))
-                        self.itemChanged.emit(item)
-            event.accept()
+    def prepare_search(self):
+        try:
+            self.search.compile(self.search_bar.find_edit.text(), self.search_bar.mode_combo.currentText())
+        except (ValueError, re.error) as e:
+            self.search_bar.set_status(f"Invalid pattern: {e}", error=True)
+            return False
+        if not self.search.ready:
+            self.search_bar.set_status("")
+            return False
+        self.search.build_index(self.buffer)
+        return True
+
+    def find_next(self, direction=1):
+        if not self.prepare_search():
+            return
+        if not self.search.matches:
+            self.clear_highlights()
+            self.search_bar.set_status("No matches", error=True)
             return
 
-        super().keyPressEvent(event)
+        current = self.current_offset()
+        if direction > 0:
+            index = self.search.next_match(current + 1 if self.search.current >= 0 else current)
+        else:
+            index = self.search.previous_match(current)
+        self.show_match(index)
 
-    def load_data(self, data):
-        self.clearContents()
-        rows = (len(data) + 15) // 16
-        self.setRowCount(rows)
-        
-        for i in range(rows):
-            addr = i * 16
-            addr_item = QTableWidgetItem(f"{addr:06X}")
-            addr_item.setFlags(addr_item.flags() & ~Qt.ItemIsEditable)
-            addr_item.setForeground(QColor("#4ec9b0"))
-            self.setItem(i, 0, addr_item)
-            
-            start = addr
-            end = min(start + 16, len(data))
-
-            for j in range(16):
-                col = j + 1
-                idx = start + j
-                if idx < end:
-                    byte = data[idx]
-                    hex_item = QTableWidgetItem(f"{byte:02X}")
-                    hex_item.setTextAlignment(Qt.AlignCenter)
-                    hex_item.setFlags(hex_item.flags() | Qt.ItemIsEditable)
-
-                    if byte != 0:
-                        hex_item.setForeground(QColor("#dcdcaa"))
-                    
-                    self.setItem(i, col, hex_item)
-                else:
-                    hex_item = QTableWidgetItem("")
-                    hex_item.setFlags(hex_item.flags() & ~Qt.ItemIsEditable)
-                    self.setItem(i, col, hex_item)
-    
-    def update_hex_row(self, row):
-        ascii_item = self.parent().parent().ascii_view.item(row, 1)
-        if not ascii_item:
+    def find_all(self):
+        if not self.prepare_search():
+            return
+        self.clear_highlights()
+        if not self.search.matches:
+            self.search_bar.set_status("No matches", error=True)
             return
-            
-        ascii_text = ascii_item.text()
-        if len(ascii_text) > 16:
-            ascii_text = ascii_text[:16]
-
-        for j in range(len(ascii_text)):
-            char = ascii_text[j]
-            byte = ord(char)
-            hex_item = self.item(row, j+1)
-            if hex_item:
-                hex_item.setText(f"{byte:02X}")
-    
-    def get_data(self):
-        data = bytearray()
-        for i in range(self.rowCount()):
-            for j in range(1, 17):
-                item = self.item(i, j)
-                if item and item.text():
-                    try:
-                        data.append(int(item.text(), 16))
-                    except ValueError:
-                        data.append(0)
-        return bytes(data)
-        
-    def clear_data(self):
-        for i in range(self.rowCount()):
-            for j in range(1, 17):
-                item = self.item(i, j)
-                if item:
-                    item.setText("00")
-        
-    def fill_data(self, value):
-        for i in range(self.rowCount()):
-            for j in range(1, 17):
-                item = self.item(i, j)
-                if item:
-                    item.setText(f"{value:02X}")
 
-class AsciiTableView(QTableWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setColumnCount(17)
-        self.setHorizontalHeaderLabels(["Address"] + [f"{i:02X}" for i in range(16)])
-        self.verticalHeader().setVisible(False)
-        self.setEditTriggers(QTableWidget.DoubleClicked | QTableWidget.EditKeyPressed)
-        self.setSelectionMode(QTableWidget.ContiguousSelection)
-        self.setShowGrid(False)
-        self.setFont(QtGui.QFont("Consolas", 10))
-        self.setAlternatingRowColors(True)
-        self.setStyleSheet("""
-            QTableWidget {
-                background-color: #161616;
-                color: #d4d4d4;
-                border: none;
-                gridline-color: #2d2d30;
-                selection-background-color: #264f78;
-                selection-color: white;
-            }
-            QHeaderView::section {
-                background-color: #2d2d30;
-                color: #9cdcfe;
-                padding: 4px;
-                border: none;
-                border-bottom: 1px solid #2d2d30;
-            }
-        """)
-        
-        header = self.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.Fixed)  
+        for start, end in self.search.matches[:self.search.MAX_HIGHLIGHTS]:
+            self.highlight_range(start, end, QColor("#613214"))
+        self.show_match(self.search.next_match(self.current_offset()))
 
-        self.setColumnWidth(0, 80)
-        for i in range(1, 17):
-            header.setSectionResizeMode(i, QHeaderView.Stretch)
+    def replace_current(self):
+        if not self.prepare_search() or not self.search.matches:
+            self.search_bar.set_status("No matches", error=True)
+            return
+        if self.search.current < 0:
+            self.find_next(1)
+            return
 
-        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
-        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        start, end = self.search.matches[self.search.current]
+        try:
+            replacement = self.search.replacement(self.buffer, start, self.search_bar.replace_edit.text())
+        except (ValueError, re.error) as e:
+            self.search_bar.set_status(f"Invalid replacement: {e}", error=True)
+            return
+        if len(replacement) != end - start:
+            self.search_bar.set_status(f"Replacement must be {end - start} byte(s)", error=True)
+            return
 
-        palette = self.palette()
-        palette.setColor(QPalette.Base, QColor("#161616"))
-        palette.setColor(QPalette.AlternateBase, QColor("#2d2d30"))
-        self.setPalette(palette)
+        self.write_bytes(start, replacement)
+        self.clear_highlights()
+        self.find_next(1)
 
-    def keyPressEvent(self, event):
-        if event.key() in (Qt.Key_Backspace, Qt.Key_Delete):
-            current_row = self.currentRow()
-            current_col = self.currentColumn()
+    def replace_all(self):
+        if not self.prepare_search() or not self.search.matches:
+            self.search_bar.set_status("No matches", error=True)
+            return
 
-            if 1 <= current_col <= 16:
-                item = self.item(current_row, current_col)
-                if item:
-                    item.setText(" ")
-                    self.itemChanged.emit(item)
+        replacements = []
+        try:
+            for start, end in self.search.matches:
+                replacement = self.search.replacement(self.buffer, start, self.search_bar.replace_edit.text())
+                if len(replacement) != end - start:
+                    self.search_bar.set_status(f"Replacement at {start:06X} must be {end - start} byte(s)", error=True)
+                    return
+                replacements.append((start, replacement))
+        except (ValueError, re.error) as e:
+            self.search_bar.set_status(f"Invalid replacement: {e}", error=True)
+            return
 
-                    hex_item = self.parent().parent().hex_view.item(current_row, current_col)
-                    if hex_item:
-                        hex_item.setText("20")
-            event.accept()
+        self.clear_highlights()
+        self.journal.begin_group()
+        try:
+            for start, replacement in replacements:
+                self.write_bytes(start, replacement)
+        finally:
+            self.journal.end_group()
+        self.search_bar.set_status(f"Replaced {len(replacements)} match(es)")
+
+    def current_offset(self):
+        row = max(self.hex_view.currentRow(), 0)
+        col = max(self.hex_view.currentColumn(), 1)
+        return row * 16 + col - 1
+
+    def show_match(self, index):
+        if index < 0:
             return
+        self.search.current = index
+        start, end = self.search.matches[index]
+        self.select_range(start, end)
+        self.search_bar.set_status(f"Match {index + 1} of {len(self.search.matches)} at 0x{start:06X}")
 
-        elif event.key() >= Qt.Key_Space and event.key() <= Qt.Key_AsciiTilde:
-            current_row = self.currentRow()
-            current_col = self.currentColumn()
-            
-            if 1 <= current_col <= 16:
-                item = self.item(current_row, current_col)
-                if not item:
-                    item = QTableWidgetItem()
-                    self.setItem(current_row, current_col, item)
-                
-                char = event.text()
-                item.setText(char)
-                item.setTextAlignment(Qt.AlignCenter)
+    def select_range(self, start, end):
+        self.hex_view.clearSelection()
+        self.ascii_view.clearSelection()
+        last = max(end - 1, start)
+        first_row, last_row = start // 16, last // 16
+        if first_row == last_row:
+            ranges = [(first_row, start % 16 + 1, first_row, last % 16 + 1)]
+        else:
+            ranges = [(first_row, start % 16 + 1, first_row, 16), (last_row, 1, last_row, last % 16 + 1)]
+            if last_row - first_row > 1:
+                ranges.insert(1, (first_row + 1, 1, last_row - 1, 16))
+        for view in (self.hex_view, self.ascii_view):
+            for selection in ranges:
+                view.setRangeSelected(QtWidgets.QTableWidgetSelectionRange(*selection), True)
+        self.hex_view.setCurrentCell(start // 16, start % 16 + 1, QtCore.QItemSelectionModel.NoUpdate)
+        for view in (self.hex_view, self.ascii_view):
+            view.scrollTo(view.model().index(start // 16, start % 16 + 1), QAbstractItemView.PositionAtCenter)
+            view.populate_visible()
+
+    def goto_address(self):
+        text = self.goto_edit.text().strip()
+        try:
+            offset = int(text[2:] if text.lower().startswith("0x") else text, 16)
+        except ValueError:
+            self.goto_edit.selectAll()
+            return
+        if not 0 <= offset < len(self.buffer):
+            self.goto_edit.setToolTip(f"Address must be below 0x{len(self.buffer):06X}")
+            self.goto_edit.selectAll()
+            return
+        self.goto_offset(offset)
 
-                hex_item = self.parent().parent().hex_view.item(current_row, current_col)
-                if hex_item:
-                    hex_item.setText(f"{ord(char):02X}")
+    def goto_offset(self, offset):
+        if offset < len(self.buffer):
+            self.select_range(offset, offset + 1)
 
-                if current_col < 16:
-                    self.setCurrentCell(current_row, current_col + 1)
-                elif current_row < self.rowCount() - 1:
-                    self.setCurrentCell(current_row + 1, 1)
-                
-                self.itemChanged.emit(item)
-            event.accept()
+    def jump_to_data(self, direction):
+        if not self.buffer:
             return
+        offset = self.block_map.next_island(self.current_offset(), direction)
+        if offset is not None:
+            self.goto_offset(offset)
 
-        super().keyPressEvent(event)
-        
-    def load_data(self, data):
-        self.clearContents()
-        rows = (len(data) + 15) // 16
-        self.setRowCount(rows)
-        
-        for i in range(rows):
-            addr = i * 16
-            addr_item = QTableWidgetItem(f"{addr:06X}")
-            addr_item.setFlags(addr_item.flags() & ~Qt.ItemIsEditable)
-            addr_item.setForeground(QColor("#4ec9b0"))
-            self.setItem(i, 0, addr_item)
-            
-            start = addr
-            end = min(start + 16, len(data))
-
-            for j in range(16):
-                col = j + 1
-                idx = start + j
-                if idx < end:
-                    byte = data[idx]
-                    if 32 <= byte <= 126:
-                        char = chr(byte)
-                    else:
-                        char = "."
-                    
-                    char_item = QTableWidgetItem(char)
-                    char_item.setTextAlignment(Qt.AlignCenter)
-                    char_item.setFlags(char_item.flags() | Qt.ItemIsEditable)
-                    char_item.setForeground(QColor("#ce9178"))
-                    self.setItem(i, col, char_item)
-                else:
-                    char_item = QTableWidgetItem(" ")
-                    char_item.setFlags(char_item.flags() & ~Qt.ItemIsEditable)
-                    self.setItem(i, col, char_item)
-    
-    def update_ascii_row(self, row):
-        pass
-            
-    def clear_data(self):
-        for i in range(self.rowCount()):
-            for j in range(1, 17):
-                item = self.item(i, j)
-                if item:
-                    item.setText(" ")
-        
-    def fill_data(self, value):
-        char = '.' if value < 32 or value > 126 else chr(value)
-        for i in range(self.rowCount()):
-            for j in range(1, 17):
-                item = self.item(i, j)
-                if item:
-                    item.setText(char)
+    def update_minimap_viewport(self, *args):
+        first = max(self.hex_view.rowAt(0), 0)
+        last = self.hex_view.rowAt(self.hex_view.viewport().height() - 1)
+        if last < 0:
+            last = self.hex_view.rowCount() - 1
+        self.minimap.set_viewport(first * 16, (last + 1) * 16)
 
-class I2CWorker(QThread):
-    operation_complete = pyqtSignal(bool, str)
-    progress_updated = pyqtSignal(int)
-    data_ready = pyqtSignal(bytes)
-    log_message = pyqtSignal(str)
-    
-    def __init__(self, operation, params):
-        super().__init__()
-        self.operation = operation
-        self.params = params
-        self.running = True
-        self.i2c = None
-        
-    def run(self):
+    def highlight_range(self, start, end, color):
+        self.hex_view.blockSignals(True)
+        self.ascii_view.blockSignals(True)
         try:
-            port = self.params['port']
-            baudrate = 115200
-            speed = self.params['speed']
-            address = self.params['address']
-            data = self.params.get('data', b'')
-            page_size = self.params.get('page_size', 4)
-            power = self.params['power'].isChecked()
-            pull_up = self.params['pull-up'].isChecked()
-
-            self.log_message.emit(f"Connecting to Bus Pirate on {port}...")
-
-            self.i2c = pyBusPirateLite.I2C(port, baudrate)
-            self.i2c.enter_bb()
-            self.i2c.enter()
-            self.i2c.configure(power=power, pullup=pull_up)
-            self.i2c.speed = speed
-            self.log_message.emit(f"Connected at {speed} mode")
-            
-            if self.operation == 'read':
-                size = self.params['size']
-                self.read_eeprom(address, size)
-            elif self.operation == 'write':
-                self.write_eeprom(address, page_size, data)
-            elif self.operation == 'erase':
-                size = self.params['size']
-                self.erase_eeprom(address, page_size, size)
-                
-            self.operation_complete.emit(True, f"{self.operation.capitalize()} completed successfully!")
-            
-        except Exception as e:
-            self.log_message.emit(f"Error: {str(e)}")
-            self.operation_complete.emit(False, f"Error: {str(e)}")
+            for offset in range(start, end):
+                self.hex_view.set_background(offset, color)
+                self.ascii_view.set_background(offset, color)
+                self.highlighted.append(offset)
         finally:
-            self.reset_to_normal()
-            self.running = False
-            
-    def reset_to_normal(self):
-        if self.i2c:
+            self.hex_view.blockSignals(False)
+            self.ascii_view.blockSignals(False)
+
+    def clear_highlights(self):
+        self.hex_view.blockSignals(True)
+        self.ascii_view.blockSignals(True)
+        try:
+            for offset in self.highlighted:
+                self.hex_view.set_background(offset, None)
+                self.ascii_view.set_background(offset, None)
+        finally:
+            self.hex_view.blockSignals(False)
+            self.ascii_view.blockSignals(False)
+        self.highlighted = []
+
+    def compare_with_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Compare With", "", "Binary Files (*.bin);;All Files (*)"
+        )
+        if file_path:
             try:
-                self.log_message.emit("Resetting Bus Pirate to normal mode...")
-                self.i2c.hw_reset()
-                self.log_message.emit("Bus Pirate reset to normal mode")
-            except Exception as e:
-                self.log_message.emit(f"Reset error: {str(e)}")
-            
-    def read_eeprom(self, address, size):
-        self.log_message.emit(f"Reading {size} bytes from address {address:02X}")
-        data = self.i2c.write_then_read(1, size, [address | 0x01])
-        self.data_ready.emit(bytes(data))
-        self.progress_updated.emit(100)
-        
-    def write_eeprom(self, address, page_size, data):
-        hex_list = list(data)
-        m_lsb = 0
-        hex_number = 0
-        final_command = []
-        total_bytes = len(hex_list)
-        
-        self.log_message.emit(f"Writing {total_bytes} bytes to EEPROM with page size {page_size}")
+                with open(file_path, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                self.compare_panel.set_status(f"Load error: {e}")
+                self.compare_panel.setVisible(True)
+                return
+            self.compare_with(data, file_path)
 
-        full_pages = total_bytes // page_size
-        
-        for i in range(full_pages):
-            if not self.running:
+    def compare_with(self, data, source):
+        self.compare_data = bytes(data)
+        self.compare_panel.source_label.setText(f"Editor vs {source}")
+        self.compare_panel.setVisible(True)
+        self.refresh_compare()
+
+    def refresh_compare(self):
+        if self.compare_data is None:
+            return
+        self.clear_highlights()
+        self.diff = ImageDiff(bytes(self.buffer), self.compare_data)
+        self.compare_panel.show_diff(self.diff)
+
+        color = QColor("#5a1d1d")
+        budget = ImageDiff.MAX_HIGHLIGHT_BYTES
+        for start, end in self.diff.ranges:
+            end = min(end, len(self.buffer), start + budget)
+            if end <= start:
+                break
+            self.highlight_range(start, end, color)
+            budget -= end - start
+        if self.diff.ranges:
+            self.show_difference(0)
+
+    def close_compare(self):
+        self.clear_highlights()
+        self.compare_panel.setVisible(False)
+        self.compare_data = None
+        self.diff = None
+
+    def next_difference(self, direction=1):
+        if self.compare_data is None:
+            return
+        if self.diff is None:
+            self.refresh_compare()
+            return
+        if not self.diff.ranges:
+            return
+
+        current = self.current_offset()
+        if direction > 0:
+            index = self.diff.next_range(current + 1)
+        else:
+            index = self.diff.previous_range(current)
+        self.show_difference(index)
+
+    def show_difference(self, index, column=None):
+        if self.diff is None or not 0 <= index < len(self.diff.ranges):
+            return
+        start, end = self.diff.ranges[index]
+        if start < len(self.buffer):
+            self.select_range(start, min(end, len(self.buffer), start + ImageDiff.MAX_SELECT_BYTES))
+        self.compare_panel.select_row(index)
+
+    def toggle_checksum_panel(self, visible):
+        self.checksum_panel.setVisible(visible)
+        if visible:
+            self.update_checksums()
+
+    def schedule_checksums(self):
+        if self.checksum_panel.isVisible():
+            self.checksum_timer.start()
+
+    def selection_changed(self):
+        if self.checksum_panel.isVisible() and self.checksum_panel.selection_scope():
+            self.checksum_timer.start()
+
+    def selected_range(self):
+        ranges = [selection for selection in self.hex_view.selectedRanges() if selection.rightColumn() >= 1]
+        if not ranges:
+            return None
+        start = min(selection.topRow() * 16 + max(selection.leftColumn(), 1) - 1 for selection in ranges)
+        end = max(selection.bottomRow() * 16 + selection.rightColumn() for selection in ranges)
+        end = min(end, len(self.buffer))
+        if end <= start:
+            return None
+        return start, end
+
+    def update_checksums(self):
+        if self.checksum_panel.selection_scope():
+            selection = self.selected_range()
+            if selection is None:
+                self.checksum_panel.show_values(None, "No selection")
                 return
-                
-            final_command.append(address)
-            final_command.append(m_lsb)
-            
-            for j in range(page_size):
-                final_command.append(hex_list[hex_number])
-                hex_number += 1
-                
-            m_lsb += page_size
+            start, end = selection
+            values = ChecksumState.compute(memoryview(self.buffer)[start:end])
+            self.checksum_panel.show_values(values, f"Selection 0x{start:06X}-0x{end - 1:06X} ({end - start} bytes)")
+        else:
+            values = self.checksums.update(self.buffer)
+            self.checksum_panel.show_values(values, f"{len(self.buffer)} bytes, {self.checksums.recomputed} CRC / "
+                                                    f"{self.checksums.rehashed} SHA-256 chunk(s) rehashed")
 
-            try:
-                self.i2c.write_then_read(len(final_command), 0, final_command)
-            except Exception as e:
-                self.log_message.emit(f"Write error: {str(e)}")
+    def embed_checksum(self):
+        panel = self.checksum_panel
+        try:
+            offset = panel.embed_offset(len(self.buffer))
+        except ValueError as e:
+            panel.show_values(None, f"Invalid offset: {e}")
+            return False
+
+        algorithm = panel.algorithm_combo.currentText()
+        appending = not panel.offset_edit.text().strip()
+        if appending and self.checksum_slot is not None and len(self.buffer) == sum(self.checksum_slot):
+            offset = self.checksum_slot[0]
+        if offset == len(self.buffer):
+            values = self.checksums.update(self.buffer)
+        else:
+            values = ChecksumState.compute(memoryview(self.buffer)[:offset])
+        digest = ChecksumState.to_bytes(algorithm, values[algorithm], panel.byteorder())
+
+        end = offset + len(digest)
+        if end > len(self.buffer) or (appending and end < len(self.buffer)):
+            self.load_data(bytes(self.buffer[:offset]) + digest, keep_history=True)
+        else:
+            self.write_bytes(offset, digest)
+        if appending:
+            self.checksum_slot = (offset, len(digest))
+        self.update_checksums()
+        return True
+
+class EditJournal:
+    MAX_BYTES = 16 * 1024 * 1024
+    MAX_MERGE = 64
+
+    def __init__(self):
+        self.undo_stack = []
+        self.redo_stack = []
+        self.size = 0
+        self.group_depth = 0
+        self.open_group = None
+        self.merge_open = False
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
+        self.size = 0
+        self.open_group = None
+        self.merge_open = False
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    @staticmethod
+    def pack(data):
+        if len(data) > 1 and data.count(data[0]) == len(data):
+            return (data[0], len(data))
+        return bytes(data)
+
+    @staticmethod
+    def unpack(packed):
+        if isinstance(packed, tuple):
+            return bytes([packed[0]]) * packed[1]
+        return packed
+
+    @staticmethod
+    def packed_size(packed):
+        return 2 if isinstance(packed, tuple) else len(packed)
+
+    def record(self, offset, old, new):
+        if old == new:
+            return
+        self.size -= sum(self.group_size(group) for group in self.redo_stack)
+        self.redo_stack = []
+
+        if self.group_depth:
+            if self.open_group is None:
+                self.open_group = []
+                self.undo_stack.append(self.open_group)
+            self.add_delta(self.open_group, offset, old, new)
+            return
+
+        last = self.undo_stack[-1] if self.undo_stack and self.merge_open else None
+        if last and len(last) == 1 and len(new) == 1:
+            last_offset, last_old, last_new = last[0]
+            if (isinstance(last_new, bytes) and last_offset + len(last_new) == offset
+                    and len(last_new) < self.MAX_MERGE):
+                last[0] = (last_offset, last_old + old, last_new + new)
+                self.size += 2
+                self.trim()
+                return
+
+        group = []
+        self.add_delta(group, offset, old, new)
+        self.undo_stack.append(group)
+        self.merge_open = len(new) == 1
+        self.trim()
+
+    def add_delta(self, group, offset, old, new):
+        old, new = self.pack(old), self.pack(new)
+        group.append((offset, old, new))
+        self.size += self.packed_size(old) + self.packed_size(new)
+
+    def begin_group(self):
+        self.group_depth += 1
+
+    def end_group(self):
+        self.group_depth -= 1
+        if not self.group_depth:
+            self.open_group = None
+            self.merge_open = False
+            self.trim()
+
+    def trim(self):
+        while self.size > self.MAX_BYTES and len(self.undo_stack) > 1:
+            self.size -= self.group_size(self.undo_stack.pop(0))
+
+    def group_size(self, group):
+        return sum(self.packed_size(old) + self.packed_size(new) for _, old, new in group)
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        group = self.undo_stack.pop()
+        self.redo_stack.append(group)
+        self.merge_open = False
+        return group
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        group = self.redo_stack.pop()
+        self.undo_stack.append(group)
+        self.merge_open = False
+        return group
+
+class ChecksumState:
+    CHUNK_SIZE = 4096
+    ALGORITHMS = ["CRC-32", "CRC-16/XMODEM", "SHA-256"]
+    CRCS = {"CRC-32": (zlib.crc32, 32), "CRC-16/XMODEM": (binascii.crc_hqx, 16)}
+    shift_tables = {}
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.crcs = []
+        self.dirty = set()
+        self.checkpoints = [hashlib.sha256()]
+        self.valid = 0
+        self.length = 0
+        self.recomputed = 0
+        self.rehashed = 0
+
+    def invalidate(self, start, end=None):
+        end = max(start + 1, end or 0)
+        self.valid = min(self.valid, start // self.CHUNK_SIZE)
+        self.dirty.update(range(start // self.CHUNK_SIZE, (end - 1) // self.CHUNK_SIZE + 1))
+
+    def update(self, buffer):
+        if len(buffer) != self.length:
+            self.invalidate(min(len(buffer), self.length), max(len(buffer), self.length))
+            self.length = len(buffer)
+
+        chunks = (len(buffer) + self.CHUNK_SIZE - 1) // self.CHUNK_SIZE
+        view = memoryview(buffer)
+        del self.crcs[chunks:]
+        self.crcs.extend([None] * (chunks - len(self.crcs)))
+        dirty = sorted(index for index in self.dirty if index < chunks)
+        for index in dirty:
+            chunk = view[index * self.CHUNK_SIZE:(index + 1) * self.CHUNK_SIZE]
+            self.crcs[index] = (zlib.crc32(chunk), binascii.crc_hqx(chunk, 0))
+        self.dirty.clear()
+        self.recomputed = len(dirty)
+
+        del self.checkpoints[self.valid + 1:]
+        sha = self.checkpoints[self.valid]
+        for index in range(self.valid, chunks):
+            sha = sha.copy()
+            sha.update(view[index * self.CHUNK_SIZE:(index + 1) * self.CHUNK_SIZE])
+            self.checkpoints.append(sha)
+        self.rehashed = chunks - self.valid
+        self.valid = chunks
+
+        values = {"SHA-256": self.checkpoints[chunks].hexdigest()}
+        for position, algorithm in enumerate(self.CRCS):
+            value = 0
+            for index, crcs in enumerate(self.crcs):
+                size = min(self.CHUNK_SIZE, len(buffer) - index * self.CHUNK_SIZE)
+                value = self.shift(algorithm, value, size) ^ crcs[position]
+            values[algorithm] = value
+        return values
+
+    @classmethod
+    def shift(cls, algorithm, value, size):
+        tables = cls.shift_tables.get((algorithm, size))
+        if tables is None:
+            crc, bits = cls.CRCS[algorithm]
+            zeros = bytes(size)
+            base = crc(zeros, 0)
+            basis = [crc(zeros, 1 << bit) ^ base for bit in range(bits)]
+            tables = []
+            for byte in range(bits // 8):
+                table = [0] * 256
+                for index in range(1, 256):
+                    low = index & -index
+                    table[index] = table[index ^ low] ^ basis[byte * 8 + low.bit_length() - 1]
+                tables.append(table)
+            cls.shift_tables[(algorithm, size)] = tables
+        result = 0
+        for byte, table in enumerate(tables):
+            result ^= table[(value >> (8 * byte)) & 0xFF]
+        return result
+
+    @staticmethod
+    def compute(data):
+        return {
+            "CRC-32": zlib.crc32(data),
+            "CRC-16/XMODEM": binascii.crc_hqx(data, 0),
+            "SHA-256": hashlib.sha256(data).hexdigest(),
+        }
+
+    @staticmethod
+    def format(algorithm, value):
+        if algorithm == "CRC-32":
+            return f"0x{value:08X}"
+        if algorithm == "CRC-16/XMODEM":
+            return f"0x{value:04X}"
+        return value
+
+    @staticmethod
+    def to_bytes(algorithm, value, byteorder):
+        if algorithm == "CRC-32":
+            return value.to_bytes(4, byteorder)
+        if algorithm == "CRC-16/XMODEM":
+            return value.to_bytes(2, byteorder)
+        return bytes.fromhex(value)
+
+class ChecksumPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(6, 4, 6, 4)
+
+        values_layout = QFormLayout()
+        self.scope_combo = QComboBox()
+        self.scope_combo.addItems(["Whole image", "Selection"])
+        values_layout.addRow("Scope:", self.scope_combo)
+
+        self.value_labels = {}
+        for algorithm in ChecksumState.ALGORITHMS:
+            label = QLabel("-")
+            label.setFont(QtGui.QFont("Consolas", 10))
+            label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+            self.value_labels[algorithm] = label
+            values_layout.addRow(f"{algorithm}:", label)
+        self.value_labels["SHA-256"].setToolTip("Re-hashed from the first edited 4 KB chunk to the end of the image; "
+                                                "the CRCs only re-read edited chunks")
+
+        self.status_label = QLabel()
+        values_layout.addRow(self.status_label)
+
+        embed_group = QGroupBox("Embed")
+        embed_layout = QFormLayout(embed_group)
+        self.algorithm_combo = QComboBox()
+        self.algorithm_combo.addItems(ChecksumState.ALGORITHMS)
+        self.offset_edit = QLineEdit()
+        self.offset_edit.setPlaceholderText("append")
+        self.byteorder_combo = QComboBox()
+        self.byteorder_combo.addItems(["Little endian", "Big endian"])
+        self.embed_on_write = QtWidgets.QCheckBox("Embed before write")
+        self.embed_btn = QPushButton("Embed Now")
+        embed_layout.addRow("Algorithm:", self.algorithm_combo)
+        embed_layout.addRow("Offset (hex):", self.offset_edit)
+        embed_layout.addRow("Byte order:", self.byteorder_combo)
+        embed_layout.addRow(self.embed_on_write, self.embed_btn)
+
+        layout.addLayout(values_layout, 1)
+        layout.addWidget(embed_group)
+
+    def selection_scope(self):
+        return self.scope_combo.currentText() == "Selection"
+
+    def show_values(self, values, status):
+        for algorithm, label in self.value_labels.items():
+            label.setText(ChecksumState.format(algorithm, values[algorithm]) if values else "-")
+        self.status_label.setText(status)
+
+    def embed_offset(self, size):
+        text = self.offset_edit.text().strip()
+        if not text:
+            return size
+        offset = int(text[2:] if text.lower().startswith("0x") else text, 16)
+        if not 0 <= offset <= size:
+            raise ValueError(f"0x{offset:X} is outside the image")
+        return offset
+
+    def byteorder(self):
+        return "little" if self.byteorder_combo.currentIndex() == 0 else "big"
+
+class BlockMap:
+    MIN_BLOCK = 256
+    MAX_BLOCKS = 4096
+    BLANK = 0
+    ZERO = 1
+    DATA = 2
+
+    def __init__(self):
+        self.load(b"")
+
+    def load(self, data, keep_baseline=False):
+        if not keep_baseline:
+            self.baseline = bytes(data)
+        self.block_size = self.MIN_BLOCK
+        while len(data) > self.block_size * self.MAX_BLOCKS:
+            self.block_size *= 2
+        count = (len(data) + self.block_size - 1) // self.block_size
+        self.kinds = [self.DATA] * count
+        self.entropy = [0.0] * count
+        self.modified = [False] * count
+        self.update(data, 0, len(data))
+
+    def update(self, data, start, end):
+        first = start // self.block_size
+        last = min((max(end, start + 1) - 1) // self.block_size, len(self.kinds) - 1)
+        view = memoryview(data)
+        blank = b'\xFF' * self.block_size
+        zero = bytes(self.block_size)
+        for index in range(first, last + 1):
+            offset = index * self.block_size
+            block = view[offset:offset + self.block_size]
+            if block == blank[:len(block)]:
+                self.kinds[index] = self.BLANK
+                self.entropy[index] = 0.0
+            elif block == zero[:len(block)]:
+                self.kinds[index] = self.ZERO
+                self.entropy[index] = 0.0
+            else:
+                self.kinds[index] = self.DATA
+                self.entropy[index] = min(8.0, 8.0 * len(zlib.compress(block, 1)) / len(block))
+            self.modified[index] = block != self.baseline[offset:offset + self.block_size]
+        return range(first, last + 1)
+
+    def block_of(self, offset):
+        return min(offset // self.block_size, max(len(self.kinds) - 1, 0))
+
+    def next_island(self, offset, direction):
+        index = self.block_of(offset)
+        kind = self.kinds[index] if self.kinds else self.BLANK
+        while 0 <= index < len(self.kinds) and self.kinds[index] == kind:
+            index += direction
+        while 0 <= index < len(self.kinds) and self.kinds[index] != self.DATA:
+            index += direction
+        if not 0 <= index < len(self.kinds):
+            return None
+        if direction < 0:
+            while index > 0 and self.kinds[index - 1] == self.DATA:
+                index -= 1
+        return index * self.block_size
+
+    def describe(self, index):
+        kind = ["blank", "zero", "data"][self.kinds[index]]
+        text = f"0x{index * self.block_size:06X}: {kind}"
+        if self.kinds[index] == self.DATA:
+            text += f", entropy {self.entropy[index]:.1f} bits/byte"
+        if self.modified[index]:
+            text += ", modified"
+        return text
+
+class BlockMapView(QWidget):
+    offset_selected = pyqtSignal(int)
+    BLANK_COLOR = QColor("#3c3c3c")
+    ZERO_COLOR = QColor("#1e1e1e")
+    MODIFIED_COLOR = QColor("#f14c4c")
+
+    def __init__(self, block_map, parent=None):
+        super().__init__(parent)
+        self.block_map = block_map
+        self.image = QtGui.QImage(2, 1, QtGui.QImage.Format_RGB32)
+        self.viewport = (0, 0)
+        self.setFixedWidth(28)
+        self.setMouseTracking(True)
+        self.refresh()
+
+    def color(self, index):
+        kind = self.block_map.kinds[index]
+        if kind == BlockMap.BLANK:
+            return self.BLANK_COLOR
+        if kind == BlockMap.ZERO:
+            return self.ZERO_COLOR
+        return QColor.fromHsv(int(210 - self.block_map.entropy[index] / 8.0 * 180), 170, 220)
+
+    def refresh(self, blocks=None):
+        count = len(self.block_map.kinds)
+        height = max(self.height(), 1)
+        if blocks is None or not count or self.image.height() != height:
+            self.image = QtGui.QImage(2, height, QtGui.QImage.Format_RGB32)
+            self.image.fill(self.BLANK_COLOR)
+            rows = range(height) if count else []
+        else:
+            rows = range(min(blocks.start * height // count, height - 1),
+                         min((blocks.stop * height + count - 1) // count, height))
+        for y in rows:
+            first = y * count // height
+            last = max((y + 1) * count // height, first + 1)
+            kinds = self.block_map.kinds[first:last]
+            if BlockMap.DATA in kinds:
+                index = max(range(first, last), key=lambda i: (self.block_map.kinds[i] == BlockMap.DATA, self.block_map.entropy[i]))
+            elif BlockMap.ZERO in kinds:
+                index = first + kinds.index(BlockMap.ZERO)
+            else:
+                index = first
+            color = self.color(index)
+            modified = any(self.block_map.modified[first:last])
+            self.image.setPixelColor(0, y, self.MODIFIED_COLOR if modified else color)
+            self.image.setPixelColor(1, y, color)
+        self.update()
+
+    def resizeEvent(self, event):
+        self.refresh()
+        super().resizeEvent(event)
+
+    def set_viewport(self, start, end):
+        self.viewport = (start, end)
+        self.update()
+
+    def offset_at(self, y):
+        size = len(self.block_map.kinds) * self.block_map.block_size
+        return max(0, min(int(y / max(self.height(), 1) * size), max(size - 1, 0)))
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.drawImage(self.rect(), self.image)
+        size = len(self.block_map.kinds) * self.block_map.block_size
+        if size:
+            top = int(self.viewport[0] / size * self.height())
+            bottom = max(int(self.viewport[1] / size * self.height()), top + 2)
+            painter.setPen(QColor("#d4d4d4"))
+            painter.drawRect(0, top, self.width() - 1, bottom - top)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.block_map.kinds:
+            self.offset_selected.emit(self.offset_at(event.y()))
+
+    def mouseMoveEvent(self, event):
+        if not self.block_map.kinds:
+            return
+        offset = self.offset_at(event.y())
+        self.setToolTip(self.block_map.describe(self.block_map.block_of(offset)))
+        if event.buttons() & Qt.LeftButton:
+            self.offset_selected.emit(offset)
+
+class ImageDiff:
+    BLOCK_SIZE = 4096
+    SCAN_SIZE = 256
+    MAX_HIGHLIGHT_BYTES = 65536
+    MAX_SELECT_BYTES = 256
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.ranges = []
+        self.compute()
+        self.starts = [start for start, _ in self.ranges]
+
+    @property
+    def diff_bytes(self):
+        return sum(end - start for start, end in self.ranges)
+
+    def compute(self):
+        common = min(len(self.left), len(self.right))
+        for start in range(0, common, self.BLOCK_SIZE):
+            end = min(start + self.BLOCK_SIZE, common)
+            if self.left[start:end] != self.right[start:end]:
+                self.scan(start, end)
+        if len(self.left) != len(self.right):
+            self.add_range(common, max(len(self.left), len(self.right)))
+
+    def scan(self, start, end):
+        if end - start <= self.SCAN_SIZE:
+            delta = int.from_bytes(self.left[start:end], "big") ^ int.from_bytes(self.right[start:end], "big")
+            for run in re.finditer(rb"[^\x00]+", delta.to_bytes(end - start, "big")):
+                self.add_range(start + run.start(), start + run.end())
+            return
+        middle = (start + end) // 2
+        for lo, hi in ((start, middle), (middle, end)):
+            if self.left[lo:hi] != self.right[lo:hi]:
+                self.scan(lo, hi)
+
+    def add_range(self, start, end):
+        if self.ranges and self.ranges[-1][1] == start:
+            self.ranges[-1] = (self.ranges[-1][0], end)
+        else:
+            self.ranges.append((start, end))
+
+    def next_range(self, offset):
+        if not self.ranges:
+            return -1
+        index = bisect.bisect_left(self.starts, offset)
+        return index if index < len(self.ranges) else 0
+
+    def previous_range(self, offset):
+        if not self.ranges:
+            return -1
+        index = bisect.bisect_left(self.starts, offset) - 1
+        return index if index >= 0 else len(self.ranges) - 1
+
+class ComparePanel(QWidget):
+    MAX_ROWS = 10000
+    PREVIEW_BYTES = 16
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMaximumHeight(220)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 4, 6, 4)
+
+        header = QHBoxLayout()
+        self.source_label = QLabel()
+        self.status_label = QLabel()
+        self.prev_btn = QPushButton("Previous Difference")
+        self.next_btn = QPushButton("Next Difference")
+        self.refresh_btn = QPushButton("Recompare")
+        self.close_btn = QPushButton("Close")
+        header.addWidget(self.source_label)
+        header.addWidget(self.status_label, 1)
+        header.addWidget(self.prev_btn)
+        header.addWidget(self.next_btn)
+        header.addWidget(self.refresh_btn)
+        header.addWidget(self.close_btn)
+        layout.addLayout(header)
+
+        self.range_table = QTableWidget(0, 4)
+        self.range_table.setHorizontalHeaderLabels(["Offset", "Length", "Editor", "Other"])
+        self.range_table.verticalHeader().setVisible(False)
+        self.range_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.range_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.range_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.range_table.setFont(QtGui.QFont("Consolas", 10))
+        header_view = self.range_table.horizontalHeader()
+        header_view.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header_view.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        header_view.setSectionResizeMode(2, QHeaderView.Stretch)
+        header_view.setSectionResizeMode(3, QHeaderView.Stretch)
+        layout.addWidget(self.range_table)
+
+    def set_status(self, text):
+        self.status_label.setText(text)
+
+    def show_diff(self, diff):
+        ranges = diff.ranges[:self.MAX_ROWS]
+        self.range_table.setRowCount(len(ranges))
+        for row, (start, end) in enumerate(ranges):
+            preview_end = min(end, start + self.PREVIEW_BYTES)
+            cells = [
+                f"{start:06X}",
+                str(end - start),
+                self.preview(diff.left[start:preview_end], end > preview_end),
+                self.preview(diff.right[start:preview_end], end > preview_end),
+            ]
+            for col, text in enumerate(cells):
+                self.range_table.setItem(row, col, QTableWidgetItem(text))
+
+        if not diff.ranges:
+            self.set_status("Images are identical")
+        else:
+            status = f"{len(diff.ranges)} difference range(s), {diff.diff_bytes} byte(s) differ"
+            if len(diff.ranges) > len(ranges):
+                status += f" (showing first {len(ranges)})"
+            self.set_status(status)
+
+    def preview(self, data, truncated):
+        text = " ".join(f"{byte:02X}" for byte in data)
+        if not data:
+            return "<missing>"
+        return text + " ..." if truncated else text
+
+    def select_row(self, row):
+        if row < self.range_table.rowCount():
+            self.range_table.selectRow(row)
+
+class BufferSearch:
+    MAX_HIGHLIGHTS = 4096
+
+    def __init__(self):
+        self.needle = None
+        self.regex = None
+        self.mode = None
+        self.key = None
+        self.matches = []
+        self.starts = []
+        self.current = -1
+        self.indexed = False
+
+    @property
+    def ready(self):
+        return self.needle is not None or self.regex is not None
+
+    def compile(self, text, mode):
+        if (text, mode) == self.key:
+            return
+        self.key = (text, mode)
+        self.needle = None
+        self.regex = None
+        self.mode = mode
+        self.invalidate()
+        if not text:
+            return
+        if mode == "Hex":
+            needle = bytes.fromhex(text.replace(" ", ""))
+            if needle:
+                self.needle = needle
+        elif mode == "ASCII":
+            self.needle = text.encode("latin-1")
+        else:
+            self.regex = re.compile(text.encode("latin-1"), re.DOTALL)
+
+    def invalidate(self):
+        self.matches = []
+        self.starts = []
+        self.current = -1
+        self.indexed = False
+
+    def build_index(self, buffer):
+        if self.indexed:
+            return
+        matches = []
+        if self.needle is not None:
+            size = len(self.needle)
+            pos = buffer.find(self.needle)
+            while pos >= 0:
+                matches.append((pos, pos + size))
+                pos = buffer.find(self.needle, pos + 1)
+        elif self.regex is not None:
+            matches = [m.span() for m in self.regex.finditer(buffer) if m.end() > m.start()]
+        self.matches = matches
+        self.starts = [start for start, _ in matches]
+        self.current = -1
+        self.indexed = True
+
+    def next_match(self, offset):
+        if not self.matches:
+            return -1
+        index = bisect.bisect_left(self.starts, offset)
+        return index if index < len(self.matches) else 0
+
+    def previous_match(self, offset):
+        if not self.matches:
+            return -1
+        index = bisect.bisect_left(self.starts, offset) - 1
+        return index if index >= 0 else len(self.matches) - 1
+
+    def replacement(self, buffer, start, text):
+        if self.mode == "Hex":
+            return bytes.fromhex(text.replace(" ", ""))
+        if self.mode == "ASCII":
+            return text.encode("latin-1")
+        match = self.regex.match(buffer, start)
+        return match.expand(text.encode("latin-1"))
+
+class SearchBar(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(6, 4, 6, 4)
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["Hex", "ASCII", "Regex"])
+
+        self.find_edit = QLineEdit()
+        self.find_edit.setPlaceholderText("Find (e.g. DE AD BE EF)")
+
+        self.replace_edit = QLineEdit()
+        self.replace_edit.setPlaceholderText("Replace with")
+
+        self.find_prev_btn = QPushButton("Previous")
+        self.find_next_btn = QPushButton("Next")
+        self.find_all_btn = QPushButton("Find All")
+        self.replace_btn = QPushButton("Replace")
+        self.replace_all_btn = QPushButton("Replace All")
+
+        self.status_label = QLabel()
+
+        layout.addWidget(self.mode_combo)
+        layout.addWidget(self.find_edit, 2)
+        layout.addWidget(self.find_prev_btn)
+        layout.addWidget(self.find_next_btn)
+        layout.addWidget(self.find_all_btn)
+        layout.addWidget(self.replace_edit, 1)
+        layout.addWidget(self.replace_btn)
+        layout.addWidget(self.replace_all_btn)
+        layout.addWidget(self.status_label)
+
+    def set_status(self, text, error=False):
+        self.status_label.setStyleSheet("color: #f48771;" if error else "")
+        self.status_label.setText(text)
+
+class ByteTableView(QTableWidget):
+    PAGE_ROWS = 64
+    EMPTY_TEXT = ""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.data = b""
+        self.populated = bytearray()
+        self.backgrounds = {}
+        self.verticalScrollBar().valueChanged.connect(self.populate_visible)
+
+    def load_data(self, data):
+        self.clearContents()
+        self.data = data
+        self.backgrounds = {}
+        rows = (len(data) + 15) // 16
+        self.populated = bytearray(rows)
+        self.setRowCount(rows)
+        self.populate_visible()
+
+    def populate_visible(self, *args):
+        if not self.populated:
+            return
+        first = max(self.rowAt(0), 0)
+        last = self.rowAt(self.viewport().height() - 1)
+        if last < 0:
+            last = first + self.PAGE_ROWS
+        self.populate_rows(first, last + last - first + 1)
+
+    def populate_rows(self, first, last):
+        last = min(last, len(self.populated) - 1)
+        if first > last or self.populated.find(0, first, last + 1) < 0:
+            return
+        blocked = self.blockSignals(True)
+        try:
+            for row in range(first, last + 1):
+                if not self.populated[row]:
+                    self.populated[row] = 1
+                    self.make_row(row)
+        finally:
+            self.blockSignals(blocked)
+
+    def make_row(self, row):
+        addr_item = QTableWidgetItem(f"{row * 16:06X}")
+        addr_item.setFlags(addr_item.flags() & ~Qt.ItemIsEditable)
+        addr_item.setForeground(QColor("#4ec9b0"))
+        self.setItem(row, 0, addr_item)
+
+        for col in range(1, 17):
+            idx = row * 16 + col - 1
+            if idx < len(self.data):
+                byte = self.data[idx]
+                item = QTableWidgetItem(self.format_byte(byte))
+                item.setTextAlignment(Qt.AlignCenter)
+                item.setFlags(item.flags() | Qt.ItemIsEditable)
+                item.setForeground(self.byte_color(byte))
+                if idx in self.backgrounds:
+                    item.setBackground(self.backgrounds[idx])
+            else:
+                item = QTableWidgetItem(self.EMPTY_TEXT)
+                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            self.setItem(row, col, item)
+
+    def set_bytes(self, offset, data):
+        for idx, byte in enumerate(data, offset):
+            item = self.item(idx // 16, idx % 16 + 1)
+            if item:
+                item.setText(self.format_byte(byte))
+                item.setForeground(self.byte_color(byte))
+
+    def format_byte(self, byte):
+        return f"{byte:02X}"
+
+    def byte_color(self, byte):
+        return QColor("#d4d4d4")
+
+    def set_background(self, offset, brush):
+        if brush is None:
+            self.backgrounds.pop(offset, None)
+        else:
+            self.backgrounds[offset] = brush
+        item = self.item(offset // 16, offset % 16 + 1)
+        if item:
+            item.setBackground(brush or QtGui.QBrush())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.populate_visible()
+
+class HexTableView(ByteTableView):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setColumnCount(17)
+        self.setHorizontalHeaderLabels(["Address"] + [f"{i:02X}" for i in range(16)])
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QTableWidget.DoubleClicked | QTableWidget.EditKeyPressed)
+        self.setSelectionMode(QTableWidget.ContiguousSelection)
+        self.setShowGrid(False)
+        self.setFont(QtGui.QFont("Consolas", 10))
+        self.setAlternatingRowColors(True)
+        
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Fixed)  
+
+        self.setColumnWidth(0, 80)
+        for i in range(1, 17):
+            header.setSectionResizeMode(i, QHeaderView.Stretch)
+
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        palette = self.palette()
+        palette.setColor(QPalette.Base, QColor("#161616"))
+        palette.setColor(QPalette.AlternateBase, QColor("#2d2d30"))
+        self.setPalette(palette)
+        
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Backspace, Qt.Key_Delete):
+            current_row = self.currentRow()
+            current_col = self.currentColumn()
+
+            if 1 <= current_col <= 16:
+                if event.key() == Qt.Key_Backspace:
+                    if current_col > 1:
+                        new_col = current_col - 1
+                        new_row = current_row
+                    else:
+                        if current_row > 0:
+                            new_row = current_row - 1
+                            new_col = 16
+                        else:
+                            new_row = 0
+                            new_col = 1
+                    self.setCurrentCell(new_row, new_col)
+
+                else:
+                    item = self.item(current_row, current_col)
+                    if item:
+                        item.setText("00")
+                        item.setForeground(QColor("#d4d4d4"))
+                        self.itemChanged.emit(item)
+            event.accept()
+            return
+
+        super().keyPressEvent(event)
+
+    def byte_color(self, byte):
+        return QColor("#dcdcaa") if byte != 0 else QColor("#d4d4d4")
+
+class AsciiTableView(ByteTableView):
+    EMPTY_TEXT = " "
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setColumnCount(17)
+        self.setHorizontalHeaderLabels(["Address"] + [f"{i:02X}" for i in range(16)])
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QTableWidget.DoubleClicked | QTableWidget.EditKeyPressed)
+        self.setSelectionMode(QTableWidget.ContiguousSelection)
+        self.setShowGrid(False)
+        self.setFont(QtGui.QFont("Consolas", 10))
+        self.setAlternatingRowColors(True)
+        
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Fixed)  
+
+        self.setColumnWidth(0, 80)
+        for i in range(1, 17):
+            header.setSectionResizeMode(i, QHeaderView.Stretch)
+
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        palette = self.palette()
+        palette.setColor(QPalette.Base, QColor("#161616"))
+        palette.setColor(QPalette.AlternateBase, QColor("#2d2d30"))
+        self.setPalette(palette)
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Backspace, Qt.Key_Delete):
+            current_row = self.currentRow()
+            current_col = self.currentColumn()
+
+            if 1 <= current_col <= 16:
+                item = self.item(current_row, current_col)
+                if item:
+                    item.setText(" ")
+                    self.itemChanged.emit(item)
+            event.accept()
+            return
+
+        elif event.key() >= Qt.Key_Space and event.key() <= Qt.Key_AsciiTilde:
+            current_row = self.currentRow()
+            current_col = self.currentColumn()
+            
+            if 1 <= current_col <= 16:
+                item = self.item(current_row, current_col)
+                if not item:
+                    item = QTableWidgetItem()
+                    self.setItem(current_row, current_col, item)
+                
+                char = event.text()
+                item.setText(char)
+                item.setTextAlignment(Qt.AlignCenter)
+
+                if current_col < 16:
+                    self.setCurrentCell(current_row, current_col + 1)
+                elif current_row < self.rowCount() - 1:
+                    self.setCurrentCell(current_row + 1, 1)
+                
+                self.itemChanged.emit(item)
+            event.accept()
+            return
+
+        super().keyPressEvent(event)
+        
+    def format_byte(self, byte):
+        return chr(byte) if 32 <= byte <= 126 else "."
+
+    def byte_color(self, byte):
+        return QColor("#ce9178")
+
+class VerifyMismatch(RuntimeError):
+    def __init__(self, message, chunk_offset):
+        super().__init__(message)
+        self.chunk_offset = chunk_offset
+
+class SpeedMemory:
+    STRIKES = 2
+    PROBE_AFTER = 10
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "speeds.json")
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def entry(self, entries, port, target):
+        entry = entries.get(f"{port}|{target}") or {}
+        if isinstance(entry, str):
+            entry = {'speed': entry}
+        return dict({'speed': None, 'clean': 0, 'strikes': 0}, **entry)
+
+    def get(self, port, target, speeds):
+        entry = self.entry(self.load(), port, target)
+        if entry['speed'] not in speeds:
+            return speeds[0]
+        index = speeds.index(entry['speed'])
+        if index > 0 and entry['clean'] >= self.PROBE_AFTER:
+            return speeds[index - 1]
+        return entry['speed']
+
+    def remember(self, port, target, speeds, started, speed):
+        entries = self.load()
+        entry = self.entry(entries, port, target)
+        stable = entry['speed'] if entry['speed'] in speeds else speeds[0]
+        probing = speeds.index(started) < speeds.index(stable)
+        if speed == started:
+            if probing:
+                entry.update(speed=started, clean=0, strikes=0)
+            else:
+                entry.update(speed=stable, clean=entry['clean'] + 1, strikes=0)
+        elif probing:
+            entry.update(speed=stable, clean=0, strikes=0)
+        elif entry['strikes'] + 1 >= self.STRIKES:
+            entry.update(speed=speed, clean=0, strikes=0)
+        else:
+            entry.update(speed=stable, clean=0, strikes=entry['strikes'] + 1)
+        entries[f"{port}|{target}"] = entry
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_path, self.path)
+        return entry['speed']
+
+class ShadowCache:
+    PROBE_COUNT = 8
+    PROBE_SIZE = 16
+    SAMPLE_COUNT = 16
+    SAMPLE_SIZE = 32
+    SAMPLED_BYTES = PROBE_COUNT * PROBE_SIZE + SAMPLE_COUNT * SAMPLE_SIZE
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "shadow")
+        self.store = ImageStore(self.path)
+        self.index_path = os.path.join(self.path, "index.json")
+
+    @classmethod
+    def probe_offsets(cls, size):
+        step = max(size // cls.PROBE_COUNT, cls.PROBE_SIZE)
+        return list(range(0, size, step))[:cls.PROBE_COUNT]
+
+    @classmethod
+    def fingerprint(cls, probes):
+        return hashlib.sha256(b"".join(probes)).hexdigest()[:16]
+
+    @classmethod
+    def image_fingerprint(cls, data):
+        return cls.fingerprint([data[offset:offset + cls.PROBE_SIZE] for offset in cls.probe_offsets(len(data))])
+
+    def load(self):
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, port, target, fingerprint, size):
+        entry = self.load().get(f"{port}|{target}")
+        if not entry or entry['fingerprint'] != fingerprint or entry['size'] != size:
+            return None
+        try:
+            return self.store.get(entry['sha256'])
+        except KeyError:
+            return None
+
+    def remember(self, port, target, data):
+        entries = self.load()
+        entries[f"{port}|{target}"] = {
+            'fingerprint': self.image_fingerprint(data),
+            'size': len(data),
+            'sha256': self.store.put(data),
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_path, self.index_path)
+
+class Metrics:
+    COUNTERS = ['retries', 'errors', 'nacks', 'verify_mismatches', 'recoveries', 'resets',
+                'bytes_sent', 'bytes_received', 'bytes_programmed']
+    lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "metrics")
+        os.makedirs(self.path, exist_ok=True)
+        self.state_path = os.path.join(self.path, "metrics.json")
+        self.prom_path = os.path.join(self.path, "metrics.prom")
+        self.events_path = os.path.join(self.path, "metrics.jsonl")
+
+    def load(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, port, part, operation, result, duration, counters):
+        moved = counters.get('bytes_sent', 0) + counters.get('bytes_received', 0)
+        event = dict(counters,
+                     timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                     port=port,
+                     part=part,
+                     operation=operation,
+                     result=result,
+                     seconds=round(duration, 4),
+                     bytes_per_second=round(moved / duration, 1) if duration > 0 else 0)
+        with self.lock:
+            with open(self.events_path, "a") as f:
+                f.write(json.dumps(event) + "\n")
+
+            state = self.load()
+            key = f"{port}|{part}"
+            entry = state.setdefault(key, {'port': port, 'part': part, 'operations': {}, 'counters': {}})
+            totals = entry['operations'].setdefault(operation, {'success': 0, 'failed': 0, 'cancelled': 0, 'seconds': 0.0})
+            totals[result] += 1
+            totals['seconds'] += duration
+            for name in self.COUNTERS:
+                entry['counters'][name] = entry['counters'].get(name, 0) + counters.get(name, 0)
+            entry['throughput'] = event['bytes_per_second']
+
+            temp_path = self.state_path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_path, self.state_path)
+            temp_path = self.prom_path + ".tmp"
+            with open(temp_path, "w") as f:
+                f.write(self.render(state))
+            os.replace(temp_path, self.prom_path)
+
+    def render(self, state):
+        lines = [
+            "# HELP bp_operations_total Bus Pirate operations by result.",
+            "# TYPE bp_operations_total counter",
+        ]
+        for entry in state.values():
+            labels = f'port="{entry["port"]}",part="{entry["part"]}"'
+            for operation, totals in entry['operations'].items():
+                for result in ['success', 'failed', 'cancelled']:
+                    lines.append(f'bp_operations_total{{{labels},operation="{operation}",result="{result}"}} {totals[result]}')
+        lines += [
+            "# HELP bp_operation_seconds_total Time spent in Bus Pirate operations.",
+            "# TYPE bp_operation_seconds_total counter",
+        ]
+        for entry in state.values():
+            labels = f'port="{entry["port"]}",part="{entry["part"]}"'
+            for operation, totals in entry['operations'].items():
+                lines.append(f'bp_operation_seconds_total{{{labels},operation="{operation}"}} {totals["seconds"]:.4f}')
+        for name in self.COUNTERS:
+            lines += [f"# HELP bp_{name}_total Bus Pirate {name.replace('_', ' ')}.",
+                      f"# TYPE bp_{name}_total counter"]
+            for entry in state.values():
+                labels = f'port="{entry["port"]}",part="{entry["part"]}"'
+                lines.append(f"bp_{name}_total{{{labels}}} {entry['counters'].get(name, 0)}")
+        lines += [
+            "# HELP bp_throughput_bytes_per_second Bus throughput of the last operation.",
+            "# TYPE bp_throughput_bytes_per_second gauge",
+        ]
+        for entry in state.values():
+            labels = f'port="{entry["port"]}",part="{entry["part"]}"'
+            lines.append(f"bp_throughput_bytes_per_second{{{labels}}} {entry.get('throughput', 0)}")
+        return "\n".join(lines) + "\n"
+
+class BusEngine(abc.ABC):
+    BAUDRATE = 115200
+    READ_CHUNK = 1024
+    SPEEDS = []
+    MAX_RETRIES = 3
+    RECIPE_STEPS = ['blank_check', 'erase', 'write', 'verify', 'read']
+
+    def __init__(self, params, log=None, progress=None, data_ready=None):
+        self.params = params
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda value: None)
+        self.data_ready = data_ready or (lambda data: None)
+        self.bus = None
+        self.io = None
+        self.loop = None
+        self.speed = None
+        self.start_speed = None
+        self.auto_speed = False
+        self.stats = {'retries': 0, 'errors': 0, 'nacks': 0, 'verify_mismatches': 0, 'recoveries': 0, 'resets': 0,
+                      'bytes_sent': 0, 'bytes_received': 0, 'bytes_programmed': 0}
+
+    async def run(self, operation):
+        try:
+            await self.open()
+            await self.execute(operation)
+        finally:
+            await self.close()
+
+    async def open(self):
+        self.loop = asyncio.get_running_loop()
+        self.io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bus-io")
+        await self.measure('connect', self.connect)
+
+    async def close(self):
+        if self.io is None:
+            return
+        if self.bus:
+            await self.reset_to_normal()
+        self.io.shutdown(wait=False)
+        self.io = None
+
+    async def execute(self, operation):
+        await self.measure(operation, lambda: self.dispatch(operation))
+
+    async def measure(self, operation, work):
+        before = dict(self.stats)
+        started = time.perf_counter()
+        result = 'failed'
+        try:
+            await work()
+            result = 'success'
+        except asyncio.CancelledError:
+            result = 'cancelled'
+            raise
+        finally:
+            counters = {key: self.stats[key] - before.get(key, 0) for key in self.stats}
+            try:
+                Metrics().record(self.params['port'], self.part_name(), operation, result,
+                                 time.perf_counter() - started, counters)
+            except OSError as e:
+                self.log(f"Could not write metrics: {str(e)}")
+
+    async def dispatch(self, operation):
+        address = self.params['address']
+        page_size = self.params.get('page_size', 4)
+        if operation == 'read':
+            if not await self.read_shadow(address, self.params['size']):
+                await self.read_eeprom(address, self.params['size'])
+        elif operation == 'write':
+            await self.write_eeprom(address, page_size, self.params.get('data', b''))
+            self.remember_image(self.params.get('data', b''))
+        elif operation == 'erase':
+            await self.erase_eeprom(address, page_size, self.params['size'])
+            self.remember_image(b'\xFF' * self.params['size'])
+        elif operation == 'verify':
+            await self.verify_eeprom(address, self.params.get('data', b''))
+        elif operation == 'patch':
+            await self.patch_eeprom(address, page_size, self.params.get('data', b''), self.params['ranges'])
+        elif operation == 'recipe':
+            await self.run_recipe(self.params['steps'])
+        else:
+            raise ValueError(f"Unknown operation: {operation}")
+
+        if self.auto_speed:
+            try:
+                stable = SpeedMemory().remember(self.params['port'], self.device_key(), self.SPEEDS,
+                                                self.start_speed, self.speed)
+                if stable == self.speed:
+                    self.log(f"Remembered {stable} as stable speed for {self.target(address)} on {self.params['port']}")
+                else:
+                    self.log(f"Keeping {stable} as stable speed for {self.target(address)}, {self.speed} was needed this time")
+            except OSError as e:
+                self.log(f"Could not save speed: {str(e)}")
+
+    @abc.abstractmethod
+    def target(self, address):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def part_name(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def device_key(self):
+        raise NotImplementedError
+
+    async def call(self, function, *args):
+        return await self.loop.run_in_executor(self.io, function, *args)
+
+    async def transaction(self, command, read_size=0):
+        data = await self.call(self.bus_transaction, command, read_size)
+        self.stats['bytes_sent'] += len(command)
+        self.stats['bytes_received'] += read_size
+        return data
+
+    def bus_transaction(self, command, read_size):
+        with TRACER.span("transaction", sent=len(command), received=read_size):
+            return self.bus.write_then_read(len(command), read_size, command)
+
+    async def transfer(self, command, read_size=0, before_retry=None):
+        attempt = 0
+        while True:
+            try:
+                return await self.transaction(command, read_size)
+            except asyncio.CancelledError:
                 raise
-                
-            self.progress_updated.emit(int(hex_number / total_bytes * 100))
-            final_command.clear()
-            time.sleep(0.01)
-
-        remaining_bytes = total_bytes % page_size
-        if remaining_bytes != 0:
-            final_command.append(address)
-            final_command.append(m_lsb)
-            final_command.extend(hex_list[hex_number:hex_number + remaining_bytes])
+            except Exception as e:
+                self.stats['errors'] += 1
+                if self.is_nack(e):
+                    self.stats['nacks'] += 1
+                if attempt >= self.MAX_RETRIES:
+                    raise
+                reason = f"Transaction error ({str(e)})"
+                recovered = await self.recover(reason)
+                stepped = (attempt > 0 or not recovered) and await self.step_down(reason)
+                if not recovered and not stepped:
+                    raise
+                attempt += 1
+                self.stats['retries'] += 1
+                if before_retry:
+                    await before_retry()
+
+    async def step_down(self, reason):
+        if not self.auto_speed or self.speed not in self.SPEEDS:
+            return False
+        index = self.SPEEDS.index(self.speed)
+        if index + 1 >= len(self.SPEEDS):
+            return False
+        self.speed = self.SPEEDS[index + 1]
+        self.log(f"{reason}, stepping down to {self.speed}")
+        await self.call(self.set_speed, self.speed)
+        return True
+
+    def set_speed(self, speed):
+        self.bus.speed = speed
+
+    async def recover(self, reason):
+        return False
+
+    def is_nack(self, error):
+        return False
+
+    async def connect(self):
+        port = self.params['port']
+        self.log(f"Connecting to Bus Pirate on {port}...")
+        with TRACER.span("connect", port=port):
+            await self.call(self.open_session, port)
+            await self.configure()
+        self.log(f"Connected at {self.speed} mode" + (" (auto)" if self.auto_speed else ""))
+
+    @abc.abstractmethod
+    def open_session(self, port):
+        raise NotImplementedError
+
+    async def configure(self):
+        speed = self.params['speed']
+        self.auto_speed = speed == "Auto"
+        if self.auto_speed:
+            speed = SpeedMemory().get(self.params['port'], self.device_key(), self.SPEEDS)
+        self.speed = self.start_speed = speed
+        await self.call(self.apply_config, self.params['power'], self.params['pull-up'], speed)
+
+    def apply_config(self, power, pull_up, speed):
+        self.bus.configure(power=power, pullup=pull_up)
+        self.bus.speed = speed
+
+    async def reset_to_normal(self):
+        try:
+            await self.call(self.hw_reset)
+        except Exception as e:
+            self.log(f"Reset error: {str(e)}")
+
+    def hw_reset(self):
+        if self.bus:
+            self.log("Resetting Bus Pirate to normal mode...")
+            with TRACER.span("reset"):
+                self.bus.hw_reset()
+            self.log("Bus Pirate reset to normal mode")
+
+    @abc.abstractmethod
+    async def read_chunk(self, address, offset, count):
+        raise NotImplementedError
+
+    async def rewind(self, address, offset=0):
+        pass
+
+    async def stream_read(self, address, size, consume, start=0):
+        previous = None
+        previous_offset = start
+        for offset in range(start, size, self.READ_CHUNK):
+            count = min(self.READ_CHUNK, size - offset)
+            pending = asyncio.ensure_future(self.read_chunk(address, offset, count))
+            await asyncio.sleep(0)
+            if previous is not None:
+                try:
+                    consume(previous_offset, previous)
+                except Exception:
+                    await asyncio.gather(pending, return_exceptions=True)
+                    raise
+            previous = await pending
+            previous_offset = offset
+            self.progress(int((offset + count) / size * 100))
+        if previous is not None:
+            consume(previous_offset, previous)
+
+    async def read_eeprom(self, address, size):
+        self.log(f"Reading {size} bytes from {self.target(address)}")
+        data = bytearray(size)
+        digest = hashlib.sha256()
+
+        def consume(offset, chunk):
+            data[offset:offset + len(chunk)] = chunk
+            digest.update(chunk)
+
+        await self.rewind(address)
+        await self.stream_read(address, size, consume)
+        self.log(f"Read SHA-256: {digest.hexdigest()}")
+        self.data_ready(bytes(data))
+        self.remember_image(bytes(data))
+        self.progress(100)
+        return bytes(data)
+
+    async def read_at(self, address, offset, count):
+        await self.rewind(address, offset)
+        return await self.read_chunk(address, offset, count)
+
+    async def read_shadow(self, address, size):
+        if not self.params.get('shadow') or size <= ShadowCache.SAMPLED_BYTES:
+            return False
+        probes = [await self.read_at(address, offset, min(ShadowCache.PROBE_SIZE, size - offset))
+                  for offset in ShadowCache.probe_offsets(size)]
+        data = ShadowCache().get(self.params['port'], self.device_key(), ShadowCache.fingerprint(probes), size)
+        if data is None:
+            self.log("No shadow image for this device, reading it in full")
+            return False
+
+        self.log(f"Opened shadow image for {self.target(address)}, SHA-256 {hashlib.sha256(data).hexdigest()}")
+        self.data_ready(data)
+        samples = sorted(random.randrange(0, max(size - ShadowCache.SAMPLE_SIZE, 0) + 1)
+                         for _ in range(ShadowCache.SAMPLE_COUNT))
+        for index, offset in enumerate(samples):
+            count = min(ShadowCache.SAMPLE_SIZE, size - offset)
+            if await self.read_at(address, offset, count) != data[offset:offset + count]:
+                self.log(f"Device differs from shadow image near 0x{offset:04X}, reading it in full")
+                return False
+            self.progress(int((index + 1) / len(samples) * 100))
+        self.log(f"Sampled verify passed ({len(samples)} x {ShadowCache.SAMPLE_SIZE} bytes), full read skipped")
+        return True
+
+    def remember_image(self, data):
+        if not self.params.get('shadow') or not data:
+            return
+        try:
+            ShadowCache().remember(self.params['port'], self.device_key(), data)
+        except OSError as e:
+            self.log(f"Could not update shadow image: {str(e)}")
+
+    async def blank_check(self, address, size):
+        self.log(f"Blank checking {size} bytes at {self.target(address)}")
+        blank = b'\xFF' * self.READ_CHUNK
+
+        def consume(offset, chunk):
+            if chunk != blank[:len(chunk)]:
+                index = next(i for i in range(len(chunk)) if chunk[i] != 0xFF)
+                raise RuntimeError(f"Blank check failed at 0x{offset + index:04X}: read {chunk[index]:02X}")
+
+        await self.rewind(address)
+        await self.stream_read(address, size, consume)
+        self.log("Device is blank")
+
+    async def verify_eeprom(self, address, data):
+        self.log(f"Verifying {len(data)} bytes at {self.target(address)}")
+        digest = hashlib.sha256()
+
+        def consume(offset, chunk):
+            expected = data[offset:offset + len(chunk)]
+            if chunk != expected:
+                index = next(i for i in range(len(chunk)) if chunk[i] != expected[i])
+                raise VerifyMismatch(f"Verify failed at 0x{offset + index:04X}: "
+                                     f"expected {expected[index]:02X}, read {chunk[index]:02X}", offset)
+            digest.update(chunk)
+
+        offset = 0
+        while True:
+            try:
+                await self.rewind(address, offset)
+                await self.stream_read(address, len(data), consume, offset)
+                break
+            except VerifyMismatch as e:
+                self.stats['verify_mismatches'] += 1
+                if not await self.step_down(str(e)):
+                    raise
+                offset = e.chunk_offset
+        self.log(f"Verify passed, SHA-256: {digest.hexdigest()}")
+        self.remember_image(data)
+
+    @abc.abstractmethod
+    async def write_eeprom(self, address, page_size, data, start=0):
+        raise NotImplementedError
+
+    async def patch_eeprom(self, address, page_size, data, ranges):
+        total_bytes = sum(end - start for start, end in ranges)
+        self.log(f"Patching {total_bytes} bytes in {len(ranges)} range(s) at {self.target(address)}")
+        progress = self.progress
+        done = 0
+        try:
+            for start, end in ranges:
+                self.progress = lambda value, done=done, size=end - start: progress(int((done + size * value / 100) / total_bytes * 100))
+                await self.write_eeprom(address, page_size, data[start:end], start)
+                done += end - start
+        finally:
+            self.progress = progress
+
+        for start, end in ranges:
+            for offset in range(start, end, self.READ_CHUNK):
+                count = min(self.READ_CHUNK, end - offset)
+                chunk = await self.read_at(address, offset, count)
+                if chunk != data[offset:offset + count]:
+                    index = next(i for i in range(count) if chunk[i] != data[offset + i])
+                    self.stats['verify_mismatches'] += 1
+                    raise VerifyMismatch(f"Verify failed at 0x{offset + index:04X}: "
+                                         f"expected {data[offset + index]:02X}, read {chunk[index]:02X}", offset)
+        self.log(f"Patch verified, image CRC-32: {zlib.crc32(data):08X}")
+        self.remember_image(data)
+
+    async def erase_eeprom(self, address, page_size, size):
+        data = b'\xFF' * size
+        await self.write_eeprom(address, page_size, data)
+        
+    async def run_recipe(self, steps):
+        address = self.params['address']
+        page_size = self.params.get('page_size', 4)
+        buffers = {'image': self.params.get('data', b'')}
+        size = self.params.get('size') or len(buffers['image'])
+        progress = self.progress
+        results = []
+
+        self.log(f"Running recipe: {', '.join(steps)}")
+        try:
+            for index, step in enumerate(steps):
+                self.progress = lambda value, index=index: progress(int((index + value / 100) / len(steps) * 100))
+                self.log(f"Step {index + 1}/{len(steps)}: {step}")
+                started = time.perf_counter()
+                try:
+                    if step == 'blank_check':
+                        await self.blank_check(address, size)
+                    elif step == 'erase':
+                        await self.erase_eeprom(address, page_size, size)
+                        self.remember_image(b'\xFF' * size)
+                    elif step == 'write':
+                        await self.write_eeprom(address, page_size, buffers['image'])
+                        self.remember_image(buffers['image'])
+                    elif step == 'verify':
+                        await self.verify_eeprom(address, buffers['image'])
+                    elif step == 'read':
+                        buffers['backup'] = await self.read_eeprom(address, size)
+                    else:
+                        raise ValueError(f"Unknown recipe step: {step}")
+                except Exception as e:
+                    results.append((step, False, time.perf_counter() - started))
+                    self.log_recipe(results, steps)
+                    raise RuntimeError(f"Recipe step '{step}' failed: {str(e)}")
+                results.append((step, True, time.perf_counter() - started))
+        finally:
+            self.progress = progress
+        self.log_recipe(results, steps)
+        return buffers
+
+    def log_recipe(self, results, steps):
+        for step, passed, elapsed in results:
+            self.log(f"  {step:<12} {'PASS' if passed else 'FAIL'} {elapsed * 1000:8.1f} ms")
+        for step in steps[len(results):]:
+            self.log(f"  {step:<12} SKIPPED")
+        passed = len(results) == len(steps) and all(result[1] for result in results)
+        total = sum(result[2] for result in results)
+        self.log(f"Recipe {'PASSED' if passed else 'FAILED'} in {total:.2f} s")
+
+class I2CEngine(BusEngine):
+    PAGE_DELAY = 0.01
+    PROBE_ATTEMPTS = 3
+    BLOCK_ADDRESSED_SIZE = 2048
+    SPEEDS = ["400kHz", "100kHz", "50kHz", "5kHz"]
+
+    def target(self, address):
+        return f"address {address:02X}"
+
+    def part_name(self):
+        return f"I2C EEPROM 0x{self.params['address']:02X}"
+
+    def device_key(self):
+        return f"0x{self.params['address']:02X}"
+
+    def open_session(self, port):
+        import pyBusPirateLite
+        self.bus = pyBusPirateLite.I2C(port, self.BAUDRATE)
+        self.bus.enter_bb()
+        self.bus.enter()
+
+    async def recover(self, reason):
+        self.log(f"{reason}, recovering I2C bus")
+        with TRACER.span("recover"):
+            try:
+                await self.call(self.clear_bus, self.params['address'])
+                self.stats['recoveries'] += 1
+                self.log("I2C bus recovered")
+                return True
+            except Exception as e:
+                self.log(f"Bus recovery failed ({str(e)}), resetting Bus Pirate")
+
+            try:
+                await self.call(self.reenter)
+                self.stats['resets'] += 1
+                return True
+            except Exception as e:
+                self.log(f"Reset failed: {str(e)}")
+                return False
+
+    def is_nack(self, error):
+        return any(cls.__name__ == "ProtocolError" for cls in type(error).__mro__)
+
+    def clear_bus(self, address):
+        self.bus.read_byte()
+        self.bus.nack()
+        self.bus.stop()
+        for attempt in range(self.PROBE_ATTEMPTS):
+            try:
+                return self.bus_transaction([address], 0)
+            except Exception:
+                if attempt + 1 >= self.PROBE_ATTEMPTS:
+                    raise
+                time.sleep(self.PAGE_DELAY / 2)
+
+    def reenter(self):
+        self.hw_reset()
+        self.bus.enter_bb()
+        self.bus.enter()
+        self.apply_config(self.params['power'], self.params['pull-up'], self.speed)
+
+    async def read_chunk(self, address, offset, count):
+        device = self.word_address(address, offset)[0]
+        data = await self.transfer([device | 0x01], count, lambda: self.rewind(address, offset))
+        return bytes(data)
+
+    async def rewind(self, address, offset=0):
+        await self.transfer(self.word_address(address, offset))
+
+    def word_address(self, address, offset):
+        size = max(self.params.get('size') or 0, len(self.params.get('data') or b''))
+        if size > self.BLOCK_ADDRESSED_SIZE:
+            return [address, (offset >> 8) & 0xFF, offset & 0xFF]
+        return [address | ((offset >> 7) & 0x0E), offset & 0xFF]
+
+    def page_command(self, address, offset, chunk):
+        return self.word_address(address, offset) + list(chunk)
+
+    async def write_eeprom(self, address, page_size, data, start=0):
+        total_bytes = len(data)
+        self.log(f"Writing {total_bytes} bytes to EEPROM with page size {page_size}")
+        if not total_bytes:
+            return
+
+        command = self.page_command(address, start, data[:page_size])
+        for offset in range(0, total_bytes, page_size):
+            pending = asyncio.ensure_future(self.transfer(command))
+            await asyncio.sleep(0)
+            next_offset = offset + page_size
+            if next_offset < total_bytes:
+                command = self.page_command(address, start + next_offset, data[next_offset:next_offset + page_size])
+
+            try:
+                await pending
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"Write error: {str(e)}")
+                raise
+
+            self.progress(int(min(next_offset, total_bytes) / total_bytes * 100))
+            self.stats['bytes_programmed'] += min(page_size, total_bytes - offset)
+            await asyncio.sleep(self.PAGE_DELAY)
+
+class SPIEngine(BusEngine):
+    READ_CHUNK = 4096
+    SPEEDS = ["8MHz", "4MHz", "2.6MHz", "2MHz", "1MHz", "250kHz", "125kHz", "30kHz"]
+    PARTS = ["25Qxx Flash", "25xx EEPROM"]
+    PAGE_SIZES = {"25Qxx Flash": 256, "25xx EEPROM": 16}
+    ERASE_MODES = ["Sector", "Chip"]
+    SECTOR_SIZE = 4096
+    SPI_MODE0 = 0b1010
+    MANUFACTURERS = {
+        0x01: "Spansion/Cypress",
+        0x1F: "Adesto/Atmel",
+        0x20: "Micron/ST",
+        0x9D: "ISSI",
+        0xBF: "SST/Microchip",
+        0xC2: "Macronix",
+        0xC8: "GigaDevice",
+        0xEF: "Winbond",
+    }
+
+    def __init__(self, params, log=None, progress=None, data_ready=None):
+        super().__init__(params, log, progress, data_ready)
+        self.erased = False
+
+    @property
+    def is_flash(self):
+        return self.params.get('part', self.PARTS[0]) == self.PARTS[0]
+
+    def target(self, address):
+        return f"SPI {'flash' if self.is_flash else 'EEPROM'}"
+
+    def part_name(self):
+        return f"SPI {self.params.get('part', self.PARTS[0])}"
+
+    def device_key(self):
+        return f"SPI {self.params.get('part', self.PARTS[0])}"
+
+    def open_session(self, port):
+        import pyBusPirateLite
+        self.bus = pyBusPirateLite.SPI(port, self.BAUDRATE)
+        self.bus.enter_bb()
+        self.bus.enter()
+
+    def apply_config(self, power, pull_up, speed):
+        self.bus.configure(power=power, pullup=pull_up)
+        self.bus.config = self.SPI_MODE0
+        self.bus.speed = speed
+
+    async def dispatch(self, operation):
+        self.erased = False
+        if operation == 'identify':
+            await self.identify()
+            return
+        await super().dispatch(operation)
+
+    def address_bytes(self, offset):
+        width = 3 if self.is_flash else 2
+        return list(offset.to_bytes(width, "big"))
+
+    async def identify(self):
+        jedec_id = bytes(await self.transfer([0x9F], 3))
+        if jedec_id in (b'\xFF\xFF\xFF', b'\x00\x00\x00'):
+            self.log("No JEDEC ID returned (EEPROM or no device)")
+            return jedec_id
+        manufacturer = self.MANUFACTURERS.get(jedec_id[0], "Unknown manufacturer")
+        message = f"JEDEC ID: {jedec_id.hex(' ').upper()} ({manufacturer}"
+        if 0x10 <= jedec_id[2] <= 0x20:
+            message += f", {(1 << jedec_id[2]) // 1024} KB"
+        self.log(message + ")")
+        return jedec_id
+
+    async def read_chunk(self, address, offset, count):
+        if self.is_flash:
+            command = [0x0B] + self.address_bytes(offset) + [0x00]
+        else:
+            command = [0x03] + self.address_bytes(offset)
+        return bytes(await self.transfer(command, count))
+
+    async def wait_ready(self, timeout, interval=0.001):
+        deadline = time.perf_counter() + timeout
+        while True:
+            status = await self.transfer([0x05], 1)
+            if not status[0] & 0x01:
+                return
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Device still busy after {timeout} s")
+            await asyncio.sleep(interval)
+
+    async def program_page(self, command):
+        await self.transfer([0x06])
+        await self.transfer(command)
+        await self.wait_ready(0.1)
+
+    async def write_eeprom(self, address, page_size, data, start=0):
+        total_bytes = len(data)
+        if self.is_flash and not self.erased:
+            await self.erase_sectors(total_bytes, start)
+        self.log(f"Programming {total_bytes} bytes to {self.target(address)} with page size {page_size}")
+        if not total_bytes:
+            return
+
+        command = [0x02] + self.address_bytes(start) + list(data[:page_size])
+        for offset in range(0, total_bytes, page_size):
+            pending = asyncio.ensure_future(self.program_page(command))
+            await asyncio.sleep(0)
+            next_offset = offset + page_size
+            if next_offset < total_bytes:
+                chunk = data[next_offset:next_offset + page_size]
+                command = [0x02] + self.address_bytes(start + next_offset) + list(chunk)
+
+            try:
+                await pending
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"Write error: {str(e)}")
+                raise
+
+            self.progress(int(min(next_offset, total_bytes) / total_bytes * 100))
+            self.stats['bytes_programmed'] += min(page_size, total_bytes - offset)
+        self.erased = False
+
+    async def erase_sectors(self, size, start=0):
+        first = start // self.SECTOR_SIZE
+        sectors = (start + size + self.SECTOR_SIZE - 1) // self.SECTOR_SIZE - first
+        self.log(f"Erasing {sectors} sector(s)")
+        for sector in range(sectors):
+            await self.transfer([0x06])
+            await self.transfer([0x20] + self.address_bytes((first + sector) * self.SECTOR_SIZE))
+            await self.wait_ready(2.0, 0.005)
+            self.progress(int((sector + 1) / sectors * 100))
+        self.erased = True
+
+    async def erase_eeprom(self, address, page_size, size):
+        if not self.is_flash:
+            await super().erase_eeprom(address, page_size, size)
+            return
+        if self.params.get('erase_mode') == "Chip":
+            self.log("Erasing whole chip...")
+            await self.transfer([0x06])
+            await self.transfer([0xC7])
+            await self.wait_ready(400.0, 0.1)
+            self.erased = True
+            self.progress(100)
+            self.log("Chip erased")
+        else:
+            await self.erase_sectors(size)
+
+ENGINES = {'I2C': I2CEngine, 'SPI': SPIEngine}
+
+class I2CWorker(QThread):
+    operation_complete = pyqtSignal(bool, str)
+    progress_updated = pyqtSignal(int)
+    data_ready = pyqtSignal(bytes)
+    log_message = pyqtSignal(str)
+    
+    def __init__(self, operation, params):
+        super().__init__()
+        self.operation = operation
+        self.params = params
+        self.running = True
+        self.loop = None
+        self.task = None
+        
+    def run(self):
+        asyncio.run(self.main())
+        self.running = False
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        engine = ENGINES[self.params.get('protocol', 'I2C')](self.params, self.log_message.emit, self.progress_updated.emit, self.data_ready.emit)
+        try:
+            if not self.running:
+                raise asyncio.CancelledError()
+            with TRACER.span(self.operation, port=self.params['port']):
+                await engine.run(self.operation)
+            self.operation_complete.emit(True, f"{self.operation.capitalize()} completed successfully!")
+        except asyncio.CancelledError:
+            self.log_message.emit("Operation cancelled")
+            self.operation_complete.emit(False, "Operation cancelled")
+        except Exception as e:
+            self.log_message.emit(f"Error: {str(e)}")
+            self.operation_complete.emit(False, f"Error: {str(e)}")
             
+    def stop(self):
+        self.running = False
+        if self.loop and self.task:
+            try:
+                self.loop.call_soon_threadsafe(self.task.cancel)
+            except RuntimeError:
+                pass
+
+def data_dir():
+    path = os.path.join(os.path.expanduser("~"), ".bp_programmer")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def default_daemon_address():
+    if hasattr(socket, "AF_UNIX") and sys.platform != "win32":
+        return os.path.join(data_dir(), "daemon.sock")
+    return "127.0.0.1:8765"
+
+def split_tcp_address(address):
+    match = re.fullmatch(r"([\w.\-]*):(\d+)", address)
+    if not match:
+        return None
+    return match.group(1) or "127.0.0.1", int(match.group(2))
+
+def is_loopback_host(host):
+    try:
+        addresses = socket.getaddrinfo(host, None)
+    except socket.gaierror:
+        return False
+    return all(ipaddress.ip_address(info[4][0].split("%")[0]).is_loopback for info in addresses)
+
+def connect_daemon(address):
+    tcp = split_tcp_address(address)
+    if tcp:
+        return socket.create_connection(tcp)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+class ImageStore:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def file(self, digest):
+        if not re.fullmatch(r"[0-9a-f]{64}", digest or ""):
+            raise ValueError(f"Invalid image hash: {digest}")
+        return os.path.join(self.path, digest + ".bin")
+
+    def has(self, digest):
+        return os.path.exists(self.file(digest))
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.file(digest)
+        if not os.path.exists(path):
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return digest
+
+    def get(self, digest):
+        try:
+            with open(self.file(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(f"Unknown image: {digest}")
+
+class DumpArchive:
+    MAGIC = b"BPA2"
+    HEADER_SIZE = 12
+    CHUNK_SIZE = 4096
+    COMPRESSORS = {
+        'zlib': (lambda data: zlib.compress(data, 9), zlib.decompress),
+        'lzma': (lambda data: lzma.compress(data, lzma.FORMAT_ALONE), lzma.decompress),
+    }
+
+    def __init__(self, path, compression='zlib'):
+        self.path = path
+        self.compression = compression
+        self.chunks = {}
+        self.dumps = []
+        self.head = 0
+        if os.path.exists(path):
+            self.read_index()
+
+    def read_index(self):
+        with open(self.path, "rb") as f:
+            header = f.read(self.HEADER_SIZE)
+            if header[:len(self.MAGIC)] != self.MAGIC:
+                raise ValueError(f"Not a dump archive: {self.path}")
+            self.head = int.from_bytes(header[len(self.MAGIC):], "little")
+            offset = self.head
+            while offset:
+                f.seek(offset)
+                length = int.from_bytes(f.read(8), "little")
+                record = json.loads(zlib.decompress(f.read(length)))
+                self.chunks.update(record['chunks'])
+                self.dumps.append(record['dump'])
+                offset = record['prev']
+        self.dumps.reverse()
+
+    def add(self, data, **metadata):
+        compress = self.COMPRESSORS[self.compression][0]
+        if not os.path.exists(self.path):
+            with open(self.path, "wb") as f:
+                f.write(self.MAGIC + bytes(self.HEADER_SIZE - len(self.MAGIC)))
+                f.flush()
+                os.fsync(f.fileno())
+        hashes = []
+        chunks = {}
+        stored = 0
+        with open(self.path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            for offset in range(0, len(data), self.CHUNK_SIZE):
+                chunk = bytes(data[offset:offset + self.CHUNK_SIZE])
+                digest = hashlib.sha256(chunk).hexdigest()
+                if digest not in self.chunks and digest not in chunks:
+                    packed = compress(chunk)
+                    chunks[digest] = [f.tell(), len(packed), self.compression]
+                    f.write(packed)
+                    stored += len(packed)
+                hashes.append(digest)
+
+            dump = dict(metadata,
+                        id=len(self.dumps) + 1,
+                        size=len(data),
+                        timestamp=metadata.get('timestamp') or time.strftime("%Y-%m-%d %H:%M:%S"),
+                        sha256=hashlib.sha256(data).hexdigest(),
+                        chunks=hashes)
+            head = f.tell()
+            record = zlib.compress(json.dumps({'prev': self.head, 'dump': dump, 'chunks': chunks}).encode())
+            f.write(len(record).to_bytes(8, "little") + record)
+            f.flush()
+            os.fsync(f.fileno())
+
+            f.seek(len(self.MAGIC))
+            f.write(head.to_bytes(8, "little"))
+            f.flush()
+            os.fsync(f.fileno())
+        self.head = head
+        self.chunks.update(chunks)
+        self.dumps.append(dump)
+        return dump, stored
+
+    def find(self, dump_id):
+        for dump in self.dumps:
+            if dump['id'] == dump_id:
+                return dump
+        raise KeyError(f"Unknown dump: {dump_id}")
+
+    def load(self, dump_id):
+        dump = self.find(dump_id)
+        data = bytearray()
+        with open(self.path, "rb") as f:
+            for digest in dump['chunks']:
+                offset, length, method = self.chunks[digest]
+                f.seek(offset)
+                data += self.COMPRESSORS[method][1](f.read(length))
+        if hashlib.sha256(data).hexdigest() != dump['sha256']:
+            raise ValueError(f"Dump {dump_id} is corrupted")
+        return dump, bytes(data)
+
+    def describe(self, dump):
+        text = f"#{dump['id']}  {dump['timestamp']}  {dump.get('device', '?')}"
+        if dump.get('address') is not None:
+            text += f" @ 0x{dump['address']:02X}"
+        return text + f"  {dump['size']} bytes  {dump['sha256'][:12]}"
+
+class BatchField:
+    FORMATS = ['ascii', 'hex', 'le', 'be']
+
+    def __init__(self, spec):
+        match = re.fullmatch(r"\s*(\w+)@(0x[0-9a-fA-F]+|\d+):(\d+)(?::(\w+))?(?:=(\S+))?\s*", spec)
+        if not match:
+            raise ValueError(f"Invalid field spec: {spec.strip()} (expected name@offset:length[:format][=start])")
+        self.name = match.group(1)
+        self.offset = int(match.group(2), 0)
+        self.length = int(match.group(3))
+        self.format = (match.group(4) or 'ascii').lower()
+        self.start = match.group(5)
+        if self.format not in self.FORMATS:
+            raise ValueError(f"Unknown format for field {self.name}: {self.format}")
+
+    def generate(self, index):
+        if self.start is None:
+            raise ValueError(f"No value for field {self.name}")
+        if self.format == 'hex':
+            value = int(re.sub(r"[^0-9a-fA-F]", "", self.start), 16) + index
+            return self.to_bytes(value, "big").hex(":").upper()
+        return str(int(self.start, 0) + index)
+
+    def encode(self, value):
+        if self.format == 'ascii':
+            data = value.encode("ascii")
+            if len(data) > self.length:
+                raise ValueError(f"Value for {self.name} is longer than {self.length} bytes: {value}")
+            return data.ljust(self.length, b'\x00')
+        if self.format == 'hex':
+            data = bytes.fromhex(re.sub(r"[^0-9a-fA-F]", "", value))
+            if len(data) != self.length:
+                raise ValueError(f"Value for {self.name} must be {self.length} bytes: {value}")
+            return data
+        return self.to_bytes(int(value, 0), "little" if self.format == 'le' else "big")
+
+    def to_bytes(self, value, byteorder):
+        try:
+            return value.to_bytes(self.length, byteorder)
+        except OverflowError:
+            raise ValueError(f"Value for {self.name} does not fit in {self.length} byte(s): {value}")
+
+class BatchPlan:
+    def __init__(self, base, specs, rows=None):
+        self.base = bytes(base)
+        self.fields = [BatchField(spec) for spec in specs.split(",") if spec.strip()]
+        self.rows = rows
+        self.index = 0
+        if not self.fields:
+            raise ValueError("No batch fields defined")
+        for field in self.fields:
+            if field.offset + field.length > len(self.base):
+                raise ValueError(f"Field {field.name} is outside the {len(self.base)} byte image")
+
+    @classmethod
+    def read_csv(cls, path):
+        with open(path, "r", newline="") as f:
+            return list(csv.DictReader(f))
+
+    @property
+    def remaining(self):
+        return None if self.rows is None else len(self.rows) - self.index
+
+    def unit(self, index):
+        if self.rows is not None and index >= len(self.rows):
+            raise IndexError("No more units in the CSV file")
+        row = self.rows[index] if self.rows is not None else {}
+        values = {}
+        patches = []
+        for field in self.fields:
+            value = row.get(field.name)
+            if value is None or value == "":
+                value = field.generate(index)
+            values[field.name] = value
+            patches.append((field.offset, field.encode(value)))
+        return values, patches
+
+    def ranges(self, patches, page_size):
+        pages = sorted({page for offset, data in patches
+                        for page in range(offset // page_size, (offset + len(data) - 1) // page_size + 1)})
+        ranges = []
+        for page in pages:
+            start = page * page_size
+            end = min(start + page_size, len(self.base))
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return ranges
+
+class DaemonJob:
+    def __init__(self, number, request, send):
+        self.number = number
+        self.id = request.get('id')
+        self.operation = request['op']
+        self.port = request['port']
+        self.send_message = send
+        self.task = None
+        self.cancelled = False
+        self.params = {
+            'port': self.port,
+            'speed': request.get('speed', "Auto"),
+            'address': int(request.get('address', 0xA0)),
+            'page_size': int(request.get('page_size', 4)),
+            'size': int(request.get('size', 256)),
+            'steps': request.get('steps', []),
+            'power': bool(request.get('power', True)),
+            'pull-up': bool(request.get('pull-up', True)),
+            'protocol': request.get('protocol', 'I2C'),
+            'part': request.get('part', SPIEngine.PARTS[0]),
+            'erase_mode': request.get('erase_mode', SPIEngine.ERASE_MODES[0]),
+            'shadow': bool(request.get('shadow', False)),
+            'ranges': request.get('ranges', []),
+        }
+
+    def send(self, event, **fields):
+        self.send_message(dict(fields, event=event, id=self.id, job=self.number))
+
+class ProgrammingDaemon:
+    OPERATIONS = ['read', 'write', 'erase', 'verify', 'patch', 'recipe', 'identify']
+    LINE_LIMIT = 32 * 1024 * 1024
+
+    def __init__(self, address, store=None, allow_remote=False):
+        self.address = address
+        self.allow_remote = allow_remote
+        self.store = store or ImageStore(os.path.join(data_dir(), "images"))
+        self.queues = {}
+        self.runners = {}
+        self.sessions = {}
+        self.jobs = {}
+        self.next_job = 1
+
+    async def serve(self):
+        tcp = split_tcp_address(self.address)
+        if tcp and not self.allow_remote and not is_loopback_host(tcp[0]):
+            raise ValueError(f"Refusing to listen on non-loopback address {self.address} without --allow-remote")
+        if tcp:
+            server = await asyncio.start_server(self.handle_client, *tcp, limit=self.LINE_LIMIT)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            server = await asyncio.start_unix_server(self.handle_client, self.address, limit=self.LINE_LIMIT)
+        self.log(f"Listening on {self.address}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for port in list(self.sessions):
+                await self.close_session(port)
+            if not tcp and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def log(self, message):
+        timestamp = time.strftime("%H:%M:%S")
+        sys.stderr.write(f"[{timestamp}] {message}\n")
+        sys.stderr.flush()
+
+    async def handle_client(self, reader, writer):
+        def send(message):
+            if not writer.is_closing():
+                writer.write((json.dumps(message) + "\n").encode())
+
+        try:
+            while True:
+                try:
+                    line = await self.read_request(reader)
+                except ValueError as e:
+                    send({'event': 'error', 'message': str(e)})
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    self.dispatch(request, send)
+                except Exception as e:
+                    send({'event': 'error', 'message': str(e)})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        oversized = False
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                line = e.partial
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+                oversized = True
+                continue
+            if oversized:
+                raise ValueError(f"Request is larger than {self.LINE_LIMIT} bytes")
+            return line
+
+    def dispatch(self, request, send):
+        op = request.get('op')
+        request_id = request.get('id')
+        if op == 'ping':
+            send({'event': 'pong', 'id': request_id})
+        elif op == 'upload':
+            data = base64.b64decode(request['data'])
+            digest = self.store.put(data)
+            if request.get('sha256') and request['sha256'] != digest:
+                raise ValueError(f"Uploaded image hash mismatch: {digest}")
+            send({'event': 'uploaded', 'id': request_id, 'sha256': digest, 'size': len(data)})
+        elif op == 'has_image':
+            send({'event': 'image', 'id': request_id, 'sha256': request['sha256'],
+                  'present': self.store.has(request['sha256'])})
+        elif op == 'download':
+            data = self.store.get(request['sha256'])
+            send({'event': 'image', 'id': request_id, 'sha256': request['sha256'],
+                  'data': base64.b64encode(data).decode()})
+        elif op == 'status':
+            send({'event': 'status', 'id': request_id,
+                  'queues': {port: queue.qsize() for port, queue in self.queues.items()},
+                  'sessions': list(self.sessions)})
+        elif op == 'cancel':
+            self.cancel(request['job'])
+        elif op in self.OPERATIONS:
+            self.submit(request, send)
+        else:
+            raise ValueError(f"Unknown op: {op}")
+
+    def submit(self, request, send):
+        job = DaemonJob(self.next_job, request, send)
+        if job.operation in ('write', 'verify', 'patch') or 'write' in job.params['steps'] or 'verify' in job.params['steps']:
+            job.params['data'] = self.store.get(request['image'])
+        self.next_job += 1
+        self.jobs[job.number] = job
+
+        queue = self.queues.get(job.port)
+        if queue is None:
+            queue = self.queues[job.port] = asyncio.Queue()
+            self.runners[job.port] = asyncio.ensure_future(self.run_queue(job.port, queue))
+        queue.put_nowait(job)
+        job.send('queued', position=queue.qsize())
+        self.log(f"Job {job.number}: {job.operation} on {job.port} queued")
+
+    def cancel(self, number):
+        job = self.jobs.get(number)
+        if job is None:
+            return
+        job.cancelled = True
+        if job.task:
+            job.task.cancel()
+        else:
+            job.send('done', success=False, message="Operation cancelled")
+            self.jobs.pop(number, None)
+
+    async def run_queue(self, port, queue):
+        while True:
+            job = await queue.get()
+            if job.cancelled:
+                continue
+            job.task = asyncio.ensure_future(self.run_job(job))
+            try:
+                await job.task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self.jobs.pop(job.number, None)
+
+    async def run_job(self, job):
+        started = time.perf_counter()
+        job.send('started')
+        self.log(f"Job {job.number}: {job.operation} on {job.port} started")
+        try:
+            engine = self.sessions.get(job.port)
+            engine_class = ENGINES[job.params.get('protocol', 'I2C')]
+            if engine is not None and not isinstance(engine, engine_class):
+                await self.close_session(job.port)
+                engine = None
+            if engine is None:
+                engine = self.sessions[job.port] = engine_class(job.params)
+                self.bind(engine, job)
+                await engine.open()
+            else:
+                engine.params = job.params
+                self.bind(engine, job)
+                await engine.configure()
+            await engine.execute(job.operation)
+        except asyncio.CancelledError:
+            await self.close_session(job.port)
+            job.send('done', success=False, message="Operation cancelled")
+            self.log(f"Job {job.number}: cancelled")
+            raise
+        except Exception as e:
+            await self.close_session(job.port)
+            job.send('done', success=False, message=f"Error: {str(e)}")
+            self.log(f"Job {job.number}: failed: {str(e)}")
+        else:
+            message = f"{job.operation.capitalize()} completed successfully!"
+            job.send('done', success=True, message=message, elapsed=time.perf_counter() - started)
+            self.log(f"Job {job.number}: done in {time.perf_counter() - started:.2f} s")
+
+    def bind(self, engine, job):
+        def data_ready(data):
+            digest = self.store.put(data)
+            job.send('data', sha256=digest, data=base64.b64encode(data).decode())
+
+        engine.log = lambda message: job.send('log', message=message)
+        engine.progress = lambda value: job.send('progress', value=value)
+        engine.data_ready = data_ready
+
+    async def close_session(self, port):
+        engine = self.sessions.pop(port, None)
+        if engine:
+            engine.log = self.log
+            await engine.close()
+
+class DaemonWorker(QThread):
+    operation_complete = pyqtSignal(bool, str)
+    progress_updated = pyqtSignal(int)
+    data_ready = pyqtSignal(bytes)
+    log_message = pyqtSignal(str)
+
+    def __init__(self, address, operation, params):
+        super().__init__()
+        self.address = address
+        self.operation = operation
+        self.params = params
+        self.sock = None
+        self.job = None
+        self.running = True
+
+    def send(self, message):
+        self.sock.sendall((json.dumps(message) + "\n").encode())
+
+    def run(self):
+        try:
+            self.sock = connect_daemon(self.address)
+            stream = self.sock.makefile("rb")
+            self.log_message.emit(f"Connected to programming daemon at {self.address}")
+
+            request = {key: value for key, value in self.params.items() if key != 'data'}
+            request.update(id=1, op=self.operation)
+            data = self.params.get('data')
+            if data:
+                digest = hashlib.sha256(data).hexdigest()
+                self.send({'id': 0, 'op': 'has_image', 'sha256': digest})
+                if not json.loads(stream.readline()).get('present'):
+                    self.send({'id': 0, 'op': 'upload', 'sha256': digest, 'data': base64.b64encode(data).decode()})
+                    reply = json.loads(stream.readline() or b"{}")
+                    if reply.get('event') != 'uploaded':
+                        raise IOError(reply.get('message', "daemon closed the connection during upload"))
+                request['image'] = digest
+            self.send(request)
+
+            for line in stream:
+                message = json.loads(line)
+                event = message.get('event')
+                if event == 'queued':
+                    self.job = message['job']
+                    if not self.running:
+                        self.send({'op': 'cancel', 'job': self.job})
+                    self.log_message.emit(f"Job {self.job} queued at position {message['position']}")
+                elif event == 'log':
+                    self.log_message.emit(message['message'])
+                elif event == 'progress':
+                    self.progress_updated.emit(message['value'])
+                elif event == 'data':
+                    self.data_ready.emit(base64.b64decode(message['data']))
+                elif event == 'error':
+                    self.operation_complete.emit(False, f"Error: {message['message']}")
+                    return
+                elif event == 'done':
+                    self.operation_complete.emit(message['success'], message['message'])
+                    return
+            self.operation_complete.emit(False, "Error: daemon closed the connection")
+        except Exception as e:
+            self.log_message.emit(f"Daemon error: {str(e)}")
+            self.operation_complete.emit(False, f"Error: {str(e)}")
+        finally:
+            if self.sock:
+                self.sock.close()
+            self.running = False
+
+    def stop(self):
+        self.running = False
+        if self.sock and self.job is not None:
+            try:
+                self.send({'op': 'cancel', 'job': self.job})
+            except OSError:
+                pass
+
+class PortWatcher(QThread):
+    ports_changed = pyqtSignal(list, list)
+    scan_failed = pyqtSignal(str)
+    BUS_PIRATE_IDS = {
+        (0x04D8, 0xFB00),
+        (0x1209, 0x7331),
+    }
+    FTDI_IDS = {
+        (0x0403, 0x6001),
+    }
+
+    def __init__(self, interval=2.0, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self.running = True
+        self.known = {}
+        self.scanned = False
+        self.failed = False
+        self.wake = threading.Event()
+
+    def run(self):
+        while self.running:
+            self.wake.clear()
             try:
-                self.i2c.write_then_read(len(final_command), 0, final_command)
+                self.scan()
+                self.failed = False
             except Exception as e:
-                self.log_message.emit(f"Write error: {str(e)}")
-                raise
-                
-            self.progress_updated.emit(100)
-            final_command.clear()
-            time.sleep(0.01)
-            
-    def erase_eeprom(self, address, page_size, size):
-        data = b'\xFF' * size
-        self.write_eeprom(address, page_size, data)
-            
+                if not self.failed:
+                    self.scan_failed.emit(f"Serial port scan failed: {str(e)}")
+                self.failed = True
+            self.wake.wait(self.interval)
+
+    def is_bus_pirate(self, port):
+        if (port.vid, port.pid) in self.BUS_PIRATE_IDS:
+            return True
+        if (port.vid, port.pid) in self.FTDI_IDS:
+            names = " ".join(filter(None, [port.product, port.manufacturer, port.description]))
+            return "bus pirate" in names.lower() or "buspirate" in names.lower()
+        return False
+
+    def scan(self):
+        import serial.tools.list_ports
+
+        current = {}
+        for port in serial.tools.list_ports.comports():
+            is_bus_pirate = self.is_bus_pirate(port)
+            current[port.device] = (port.device, port.description or "", is_bus_pirate)
+
+        added = [info for device, info in current.items() if self.known.get(device) != info]
+        removed = [device for device in self.known if device not in current]
+        first_scan = not self.scanned
+        self.scanned = True
+        self.known = current
+        if added or removed or first_scan:
+            self.ports_changed.emit(added, removed)
+
+    def refresh(self):
+        self.wake.set()
+
     def stop(self):
         self.running = False
-        self.reset_to_normal()
+        self.wake.set()
 
 class ModernButton(QPushButton):
     def __init__(self, text, icon=None, parent=None):
@@ -553,107 +3166,20 @@ class ModernButton(QPushButton):
         if icon:
             self.setIcon(icon)
             
-        self.setStyleSheet("""
-            QPushButton {
-                background-color: #0078d7;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 16px;
-                font-weight: bold;
-                min-height: 32px;
-            }
-            QPushButton:hover {
-                background-color: #1c97ea;
-            }
-            QPushButton:pressed {
-                background-color: #005a9e;
-            }
-            QPushButton:disabled {
-                background-color: #333344;
-                color: #888888;
-            }
-        """)
 
 class EEPROMProgrammer(QMainWindow):
-    def __init__(self):
+    def __init__(self, daemon_address=None):
         super().__init__()
+        self.daemon_address = daemon_address
         self.setWindowTitle("BP Programmer")
         self.setGeometry(100, 100, 1200, 800)
         self.setup_styles()
         self.init_ui()
         
     def setup_styles(self):
-        self.setStyleSheet("""
-            QMainWindow, QWidget {
-                background-color: #2d2d30;
-                color: #d4d4d4;
-                font-family: 'Segoe UI', Arial, sans-serif;
-            }
-            QGroupBox {
-                border: 1px solid #3c3c3c;
-                border-radius: 8px;
-                margin-top: 1ex;
-                padding: 15px;
-                background-color: #2d2d30;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px;
-                color: #9cdcfe;
-            }
-            QLineEdit, QComboBox {
-                background-color: #333333;
-                color: #d4d4d4;
-                border: 1px solid #3c3c3c;
-                border-radius: 4px;
-                padding: 5px;
-                min-height: 28px;
-            }
-            QLineEdit:focus, QComboBox:focus {
-                border: 1px solid #0078d7;
-            }
-            QProgressBar {
-                border: 1px solid #3c3c3c;
-                border-radius: 4px;
-                background-color: #2d2d30;
-                text-align: center;
-            }
-            QProgressBar::chunk {
-                background-color: #0078d7;
-                border-radius: 4px;
-            }
-            QTextEdit {
-                background-color: #1e1e1e;
-                color: #d4d4d4;
-                border: 1px solid #3c3c3c;
-                border-radius: 4px;
-                font-family: 'Consolas', monospace;
-            }
-            QLabel {
-                color: #9cdcfe;
-            }
-            QTabWidget::pane {
-                border: none;
-                background-color: #2d2d30;
-            }
-            QTabBar::tab {
-                background-color: #2d2d30;
-                color: #d4d4d4;
-                padding: 8px 16px;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                margin-right: 2px;
-            }
-            QTabBar::tab:selected {
-                background-color: #2d2d30;
-                border-bottom: 2px solid #0078d7;
-            }
-            QTabBar::tab:hover {
-                background-color: #3d3d3d;
-            }
-        """)
+        app = QApplication.instance()
+        if app.styleSheet() != APP_STYLESHEET:
+            app.setStyleSheet(APP_STYLESHEET)
 
         palette = QPalette()
         palette.setColor(QPalette.Window, QColor("#2d2d30"))
@@ -673,6 +3199,12 @@ class EEPROMProgrammer(QMainWindow):
     def init_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
+
+        tools_menu = self.menuBar().addMenu("Tools")
+        self.profile_action = QAction("Profiling", self)
+        self.profile_action.setCheckable(True)
+        self.profile_action.toggled.connect(self.toggle_profiling)
+        tools_menu.addAction(self.profile_action)
         main_layout = QVBoxLayout(central_widget)
         main_layout.setSpacing(15)
         main_layout.setContentsMargins(15, 15, 15, 15)
@@ -691,36 +3223,25 @@ class EEPROMProgrammer(QMainWindow):
     
         refresh_btn = ModernButton("Refresh Ports")
         refresh_btn.clicked.connect(self.refresh_ports)
+
+        self.auto_select_check = QtWidgets.QCheckBox("Auto-select Bus Pirate")
+        self.auto_select_check.setChecked(True)
+
+        self.protocol_combo = QComboBox()
+        self.protocol_combo.addItems(list(ENGINES))
+        self.protocol_combo.currentTextChanged.connect(self.protocol_changed)
     
         self.speed_combo = QComboBox()
-        self.speed_combo.addItems(["400kHz", "100kHz", "50kHz", "5kHz"])
-        self.speed_combo.setCurrentIndex(1)
+        self.speed_combo.addItems(["Auto"] + I2CEngine.SPEEDS)
+        self.speed_combo.setCurrentIndex(0)
 
         self.power_check = QtWidgets.QCheckBox("Power")
         self.power_check.setChecked(True)
         self.pullup_check = QtWidgets.QCheckBox("Pull-up")
         self.pullup_check.setChecked(True)
+        self.shadow_check = QtWidgets.QCheckBox("Shadow Cache")
+        self.shadow_check.setToolTip("Open known devices from the last image written or read, after a sampled verify")
 
-        checkbox_style = """
-            QCheckBox {
-                color: #d4d4d4;
-                spacing: 5px;
-            }
-            QCheckBox::indicator {
-                width: 16px;
-                height: 16px;
-            }
-            QCheckBox::indicator:unchecked {
-                border: 1px solid #3c3c3c;
-                background: #333333;
-            }
-            QCheckBox::indicator:checked {
-                border: 1px solid #3c3c3c;
-                background: #0078d7;
-            }
-        """
-        self.power_check.setStyleSheet(checkbox_style)
-        self.pullup_check.setStyleSheet(checkbox_style)
 
         separator = QFrame()
         separator.setFrameShape(QFrame.VLine)
@@ -730,14 +3251,19 @@ class EEPROMProgrammer(QMainWindow):
         top_layout.addWidget(QLabel("Serial Port:"))
         top_layout.addWidget(self.port_combo)
         top_layout.addWidget(refresh_btn)
+        top_layout.addWidget(self.auto_select_check)
         top_layout.addSpacing(20)
-        top_layout.addWidget(QLabel("I2C Speed:"))
+        top_layout.addWidget(QLabel("Protocol:"))
+        top_layout.addWidget(self.protocol_combo)
+        self.speed_label = QLabel("I2C Speed:")
+        top_layout.addWidget(self.speed_label)
         top_layout.addWidget(self.speed_combo)
         top_layout.addSpacing(20)
         top_layout.addWidget(separator)
         top_layout.addSpacing(20)
         top_layout.addWidget(self.power_check)
         top_layout.addWidget(self.pullup_check)
+        top_layout.addWidget(self.shadow_check)
         top_layout.addStretch()
 
         device_group = QGroupBox()
@@ -753,6 +3279,9 @@ class EEPROMProgrammer(QMainWindow):
             "1K (128B)", "2K (256B)", "4K (512B)", 
             "8K (1KB)", "16K (2KB)", "32K (4KB)", 
             "64K (8KB)", "128K (16KB)", "256K (32KB)",
+            "512K (64KB)", "1M (128KB)", "2M (256KB)",
+            "4M (512KB)", "8M (1MB)", "16M (2MB)",
+            "32M (4MB)", "64M (8MB)", "128M (16MB)",
             "Custom"
         ])
         self.size_combo.setCurrentIndex(1)
@@ -765,11 +3294,24 @@ class EEPROMProgrammer(QMainWindow):
         
         self.page_size_edit = QLineEdit("4")
         self.page_size_edit.setValidator(QtGui.QIntValidator(1, 256))
+
+        self.part_label = QLabel("SPI Part:")
+        self.part_combo = QComboBox()
+        self.part_combo.addItems(SPIEngine.PARTS)
+        self.part_combo.currentTextChanged.connect(self.part_changed)
+
+        self.erase_mode_label = QLabel("Erase Mode:")
+        self.erase_mode_combo = QComboBox()
+        self.erase_mode_combo.addItems(SPIEngine.ERASE_MODES)
+
+        self.address_label = QLabel("I2C Address (hex):")
         
-        device_layout_form.addRow("I2C Address (hex):", self.address_edit)
+        device_layout_form.addRow(self.address_label, self.address_edit)
+        device_layout_form.addRow(self.part_label, self.part_combo)
         device_layout_form.addRow("EEPROM Size:", self.size_combo)
         device_layout_form.addRow(self.custom_size_label, self.custom_size_edit)
         device_layout_form.addRow("Page Size (bytes):", self.page_size_edit)
+        device_layout_form.addRow(self.erase_mode_label, self.erase_mode_combo)
 
         operations_group = QGroupBox()
         operations_layout = QHBoxLayout(operations_group)
@@ -783,10 +3325,23 @@ class EEPROMProgrammer(QMainWindow):
         
         self.erase_btn = ModernButton("Erase EEPROM")
         self.erase_btn.clicked.connect(self.erase_eeprom)
+
+        self.verify_btn = ModernButton("Verify EEPROM")
+        self.verify_btn.clicked.connect(self.verify_eeprom)
+
+        self.identify_btn = ModernButton("Read ID")
+        self.identify_btn.clicked.connect(self.identify_device)
+
+        self.cancel_btn = ModernButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_operation)
+        self.cancel_btn.setEnabled(False)
         
+        operations_layout.addWidget(self.identify_btn, 1)
         operations_layout.addWidget(self.read_btn, 1)
         operations_layout.addWidget(self.write_btn, 1)
         operations_layout.addWidget(self.erase_btn, 1)
+        operations_layout.addWidget(self.verify_btn, 1)
+        operations_layout.addWidget(self.cancel_btn, 1)
         operations_layout.addStretch()
 
         file_ops_group = QGroupBox()
@@ -802,6 +3357,53 @@ class EEPROMProgrammer(QMainWindow):
         file_ops_layout.addWidget(self.load_btn, 1) 
         file_ops_layout.addStretch()
 
+        recipe_group = QGroupBox()
+        recipe_layout = QHBoxLayout(recipe_group)
+
+        self.recipe_edit = QLineEdit("blank_check, write, verify, read")
+        self.recipe_edit.setToolTip("Comma separated steps: " + ", ".join(I2CEngine.RECIPE_STEPS))
+
+        self.run_recipe_btn = ModernButton("Run Recipe")
+        self.run_recipe_btn.clicked.connect(self.run_recipe)
+
+        self.load_recipe_btn = ModernButton("Load Recipe")
+        self.load_recipe_btn.clicked.connect(self.load_recipe)
+
+        self.save_recipe_btn = ModernButton("Save Recipe")
+        self.save_recipe_btn.clicked.connect(self.save_recipe)
+
+        recipe_layout.addWidget(QLabel("Recipe:"))
+        recipe_layout.addWidget(self.recipe_edit, 2)
+        recipe_layout.addWidget(self.run_recipe_btn, 1)
+        recipe_layout.addWidget(self.load_recipe_btn, 1)
+        recipe_layout.addWidget(self.save_recipe_btn, 1)
+
+        batch_group = QGroupBox()
+        batch_layout = QHBoxLayout(batch_group)
+
+        self.batch_fields_edit = QLineEdit()
+        self.batch_fields_edit.setPlaceholderText("serial@0x00:8:ascii=1000, mac@0x10:6:hex=00:11:22:33:44:00")
+        self.batch_fields_edit.setToolTip("Comma separated name@offset:length[:format][=start], formats: "
+                                          + ", ".join(BatchField.FORMATS))
+
+        self.load_csv_btn = ModernButton("Load CSV")
+        self.load_csv_btn.clicked.connect(self.load_batch_csv)
+
+        self.next_unit_btn = ModernButton("Program Next Unit")
+        self.next_unit_btn.clicked.connect(self.program_next_unit)
+
+        self.reset_batch_btn = ModernButton("Reset Batch")
+        self.reset_batch_btn.clicked.connect(self.reset_batch)
+
+        self.batch_status = QLabel("No batch")
+
+        batch_layout.addWidget(QLabel("Batch:"))
+        batch_layout.addWidget(self.batch_fields_edit, 2)
+        batch_layout.addWidget(self.load_csv_btn, 1)
+        batch_layout.addWidget(self.next_unit_btn, 1)
+        batch_layout.addWidget(self.reset_batch_btn, 1)
+        batch_layout.addWidget(self.batch_status)
+
         log_group = QGroupBox()
         log_layout = QVBoxLayout(log_group)
         log_layout.setContentsMargins(5, 15, 5, 5)
@@ -815,18 +3417,19 @@ class EEPROMProgrammer(QMainWindow):
         device_tab_layout.addWidget(device_group)
         device_tab_layout.addWidget(operations_group)
         device_tab_layout.addWidget(file_ops_group)
+        device_tab_layout.addWidget(recipe_group)
+        device_tab_layout.addWidget(batch_group)
         device_tab_layout.addWidget(log_group)
 
         self.tab_widget.addTab(device_tab, "Programmer")
 
-        hex_tab = QWidget()
-        hex_layout = QVBoxLayout(hex_tab)
+        self.hex_tab = QWidget()
+        hex_layout = QVBoxLayout(self.hex_tab)
         hex_layout.setContentsMargins(0, 0, 0, 0)
+        self._hex_editor = None
 
-        self.hex_editor = HexEditor()
-        hex_layout.addWidget(self.hex_editor)
-
-        self.tab_widget.addTab(hex_tab, "Hex Editor")
+        self.tab_widget.addTab(self.hex_tab, "Hex Editor")
+        self.tab_widget.currentChanged.connect(self.tab_changed)
 
         main_layout.addWidget(self.tab_widget)
 
@@ -839,25 +3442,105 @@ class EEPROMProgrammer(QMainWindow):
 
         self.worker = None
         self.current_file = None
+        self.batch = None
+        self.batch_rows = None
+        self.batch_unit = None
+
+        if self.daemon_address:
+            self.log(f"Operations will run on the programming daemon at {self.daemon_address}")
 
-        QtCore.QTimer.singleShot(100, self.refresh_ports)
+        self.protocol_changed(self.protocol_combo.currentText())
+
+        self.port_watcher = PortWatcher()
+        self.port_watcher.ports_changed.connect(self.ports_changed)
+        self.port_watcher.scan_failed.connect(self.log)
+        self.port_watcher.start()
         
+    @property
+    def hex_editor(self):
+        if self._hex_editor is None:
+            self._hex_editor = HexEditor()
+            self._hex_editor.compare_device_requested.connect(self.compare_with_device)
+            self._hex_editor.setEnabled(self.read_btn.isEnabled())
+            self.hex_tab.layout().addWidget(self._hex_editor)
+        return self._hex_editor
+
+    def tab_changed(self, index):
+        if self.tab_widget.widget(index) is self.hex_tab and self._hex_editor is None:
+            self.hex_editor.setFocus()
+
+    def create_worker(self, operation, params):
+        params = dict(params,
+                      protocol=self.protocol_combo.currentText(),
+                      part=self.part_combo.currentText(),
+                      erase_mode=self.erase_mode_combo.currentText(),
+                      size=params.get('size', self.get_eeprom_size()),
+                      shadow=params.get('shadow', self.shadow_check.isChecked()))
+        if self.daemon_address:
+            return DaemonWorker(self.daemon_address, operation, params)
+        return I2CWorker(operation, params)
+
+    def protocol_changed(self, protocol):
+        is_spi = protocol == "SPI"
+        self.speed_label.setText(f"{protocol} Speed:")
+        self.speed_combo.clear()
+        self.speed_combo.addItems(["Auto"] + ENGINES[protocol].SPEEDS)
+        self.address_label.setVisible(not is_spi)
+        self.address_edit.setVisible(not is_spi)
+        self.part_label.setVisible(is_spi)
+        self.part_combo.setVisible(is_spi)
+        self.erase_mode_label.setVisible(is_spi)
+        self.erase_mode_combo.setVisible(is_spi)
+        self.identify_btn.setVisible(is_spi)
+        self.page_size_edit.setText(str(SPIEngine.PAGE_SIZES[self.part_combo.currentText()]) if is_spi else "4")
+
+    def part_changed(self, part):
+        if self.protocol_combo.currentText() == "SPI":
+            self.page_size_edit.setText(str(SPIEngine.PAGE_SIZES[part]))
+
+    def describe_target(self, address):
+        if self.protocol_combo.currentText() == "SPI":
+            return f"SPI {self.part_combo.currentText()}"
+        return f"address 0x{address:02X}"
+
     def toggle_custom_size(self, index):
         is_custom = self.size_combo.currentText() == "Custom"
         self.custom_size_edit.setVisible(is_custom)
         self.custom_size_label.setVisible(is_custom)
         
     def refresh_ports(self):
-        self.port_combo.clear()
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            self.port_combo.addItem(port.device)
-        
-        if not ports:
+        self.port_watcher.refresh()
+
+    def ports_changed(self, added, removed):
+        for device in removed:
+            index = self.port_combo.findText(device)
+            if index >= 0:
+                self.port_combo.removeItem(index)
+            self.log(f"Port removed: {device}")
+
+        placeholder = self.port_combo.findText("No ports found")
+        if added and placeholder >= 0:
+            self.port_combo.removeItem(placeholder)
+
+        for device, description, is_bus_pirate in added:
+            index = self.port_combo.findText(device)
+            if index < 0:
+                self.port_combo.addItem(device)
+                index = self.port_combo.count() - 1
+            self.port_combo.setItemData(index, description, Qt.ToolTipRole)
+            self.port_combo.setItemData(index, QColor("#4ec9b0") if is_bus_pirate else None, Qt.ForegroundRole)
+            if is_bus_pirate:
+                self.log(f"Bus Pirate found on {device} ({description})")
+                if self.auto_select_check.isChecked() and self.port_combo.isEnabled():
+                    self.port_combo.setCurrentIndex(index)
+            else:
+                self.log(f"Port found: {device}")
+
+        if self.port_combo.count() == 0:
             self.port_combo.addItem("No ports found")
             self.log("No serial ports found. Connect Bus Pirate and click Refresh.")
         else:
-            self.log(f"Found {len(ports)} serial port(s)")
+            self.log(f"Found {self.port_combo.count()} serial port(s)")
     
     def get_eeprom_size(self):
         if self.size_combo.currentText() == "Custom":
@@ -876,7 +3559,16 @@ class EEPROMProgrammer(QMainWindow):
             "32K (4KB)": 4096,
             "64K (8KB)": 8192,
             "128K (16KB)": 16384,
-            "256K (32KB)": 32768
+            "256K (32KB)": 32768,
+            "512K (64KB)": 65536,
+            "1M (128KB)": 131072,
+            "2M (256KB)": 262144,
+            "4M (512KB)": 524288,
+            "8M (1MB)": 1048576,
+            "16M (2MB)": 2097152,
+            "32M (4MB)": 4194304,
+            "64M (8MB)": 8388608,
+            "128M (16MB)": 16777216
         }
         return size_map.get(size_str, 256)
     
@@ -909,18 +3601,18 @@ class EEPROMProgrammer(QMainWindow):
             
         size = self.get_eeprom_size()
         address = self.get_i2c_address()
-        self.log(f"Starting EEPROM read: {size} bytes from address 0x{address:02X}")
+        self.log(f"Starting EEPROM read: {size} bytes from {self.describe_target(address)}")
         
         params = {
             'port': self.port_combo.currentText(),
             'speed': self.speed_combo.currentText(),
             'address': address,
             'size': size,
-            'power': self.power_check,
-            'pull-up': self.pullup_check
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked()
         }
         
-        self.worker = I2CWorker('read', params)
+        self.worker = self.create_worker('read', params)
         self.worker.operation_complete.connect(self.operation_finished)
         self.worker.data_ready.connect(self.eeprom_data_ready)
         self.worker.progress_updated.connect(self.update_progress)
@@ -931,6 +3623,61 @@ class EEPROMProgrammer(QMainWindow):
         self.progress_bar.setValue(0)
         self.worker.start()
     
+    def identify_device(self):
+        if not self.port_combo.currentText() or "No ports" in self.port_combo.currentText():
+            self.log("Error: No valid port selected!")
+            return
+
+        self.log(f"Reading JEDEC ID from {self.describe_target(0)}")
+
+        params = {
+            'port': self.port_combo.currentText(),
+            'speed': self.speed_combo.currentText(),
+            'address': 0,
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked()
+        }
+
+        self.worker = self.create_worker('identify', params)
+        self.worker.operation_complete.connect(self.operation_finished)
+        self.worker.progress_updated.connect(self.update_progress)
+        self.worker.log_message.connect(self.log)
+
+        self.set_ui_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.worker.start()
+
+    def compare_with_device(self):
+        if not self.port_combo.currentText() or "No ports" in self.port_combo.currentText():
+            self.log("Error: No valid port selected!")
+            return
+
+        size = self.get_eeprom_size()
+        address = self.get_i2c_address()
+        self.log(f"Reading {size} bytes from {self.describe_target(address)} for comparison")
+
+        params = {
+            'port': self.port_combo.currentText(),
+            'speed': self.speed_combo.currentText(),
+            'address': address,
+            'size': size,
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked(),
+            'shadow': False
+        }
+
+        self.worker = self.create_worker('read', params)
+        self.worker.operation_complete.connect(self.operation_finished)
+        self.worker.data_ready.connect(self.compare_data_ready)
+        self.worker.progress_updated.connect(self.update_progress)
+        self.worker.log_message.connect(self.log)
+
+        self.set_ui_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.worker.start()
+    
     def write_eeprom(self):
         if not self.port_combo.currentText() or "No ports" in self.port_combo.currentText():
             self.log("Error: No valid port selected!")
@@ -938,13 +3685,18 @@ class EEPROMProgrammer(QMainWindow):
             
         address = self.get_i2c_address()
         page_size = self.get_page_size()
+        if self.hex_editor.checksum_panel.embed_on_write.isChecked():
+            if not self.hex_editor.embed_checksum():
+                self.log("Error: Could not embed checksum, check the offset")
+                return
+            self.log(f"Embedded {self.hex_editor.checksum_panel.algorithm_combo.currentText()} checksum")
         data = self.hex_editor.get_data()
         
         if not data:
             self.log("Error: No data to write!")
             return
             
-        self.log(f"Starting EEPROM write: {len(data)} bytes to address 0x{address:02X}")
+        self.log(f"Starting EEPROM write: {len(data)} bytes to {self.describe_target(address)}")
         
         params = {
             'port': self.port_combo.currentText(),
@@ -952,11 +3704,11 @@ class EEPROMProgrammer(QMainWindow):
             'address': address,
             'page_size': page_size,
             'data': data,
-            'power': self.power_check,
-            'pull-up': self.pullup_check
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked()
         }
         
-        self.worker = I2CWorker('write', params)
+        self.worker = self.create_worker('write', params)
         self.worker.operation_complete.connect(self.operation_finished)
         self.worker.progress_updated.connect(self.update_progress)
         self.worker.log_message.connect(self.log)
@@ -974,7 +3726,7 @@ class EEPROMProgrammer(QMainWindow):
         size = self.get_eeprom_size()
         address = self.get_i2c_address()
         page_size = self.get_page_size()
-        self.log(f"Starting EEPROM erase: {size} bytes at address 0x{address:02X}")
+        self.log(f"Starting EEPROM erase: {size} bytes at {self.describe_target(address)}")
         
         params = {
             'port': self.port_combo.currentText(),
@@ -982,11 +3734,11 @@ class EEPROMProgrammer(QMainWindow):
             'address': address,
             'page_size': page_size,
             'size': size,
-            'power': self.power_check,
-            'pull-up': self.pullup_check
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked()
         }
         
-        self.worker = I2CWorker('erase', params)
+        self.worker = self.create_worker('erase', params)
         self.worker.operation_complete.connect(self.operation_finished)
         self.worker.progress_updated.connect(self.update_progress)
         self.worker.log_message.connect(self.log)
@@ -995,6 +3747,241 @@ class EEPROMProgrammer(QMainWindow):
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.worker.start()
+
+    def verify_eeprom(self):
+        if not self.port_combo.currentText() or "No ports" in self.port_combo.currentText():
+            self.log("Error: No valid port selected!")
+            return
+
+        address = self.get_i2c_address()
+        data = self.hex_editor.get_data()
+
+        if not data:
+            self.log("Error: No data to verify!")
+            return
+
+        self.log(f"Starting EEPROM verify: {len(data)} bytes at {self.describe_target(address)}")
+
+        params = {
+            'port': self.port_combo.currentText(),
+            'speed': self.speed_combo.currentText(),
+            'address': address,
+            'data': data,
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked()
+        }
+
+        self.worker = self.create_worker('verify', params)
+        self.worker.operation_complete.connect(self.operation_finished)
+        self.worker.progress_updated.connect(self.update_progress)
+        self.worker.log_message.connect(self.log)
+
+        self.set_ui_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.worker.start()
+
+    def load_batch_csv(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Load Batch CSV", "", "CSV Files (*.csv);;All Files (*)"
+        )
+
+        if file_path:
+            try:
+                self.batch_rows = BatchPlan.read_csv(file_path)
+                self.batch = None
+                self.log(f"Loaded {len(self.batch_rows)} unit(s) from {file_path}")
+                self.batch_status.setText(f"{len(self.batch_rows)} unit(s) loaded")
+            except Exception as e:
+                self.log(f"CSV load error: {str(e)}")
+
+    def reset_batch(self):
+        self.batch = None
+        self.batch_status.setText("No batch")
+        self.log("Batch reset, the next unit gets the full image")
+
+    def program_next_unit(self):
+        if not self.port_combo.currentText() or "No ports" in self.port_combo.currentText():
+            self.log("Error: No valid port selected!")
+            return
+
+        try:
+            if self.batch is None:
+                base = self.hex_editor.get_data()
+                if not base:
+                    self.log("Error: Load a base image first!")
+                    return
+                self.batch = BatchPlan(base, self.batch_fields_edit.text(), self.batch_rows)
+                self.log(f"Batch started: {len(base)} byte base image, fields "
+                         + ", ".join(field.name for field in self.batch.fields))
+            index = self.batch.index
+            values, patches = self.batch.unit(index)
+        except (ValueError, IndexError) as e:
+            self.log(f"Batch error: {str(e)}")
+            return
+
+        for offset, data in patches:
+            self.hex_editor.write_bytes(offset, data, record=False)
+        data = self.hex_editor.get_data()
+
+        address = self.get_i2c_address()
+        page_size = self.get_page_size()
+        if self.protocol_combo.currentText() == "SPI" and self.part_combo.currentText() == SPIEngine.PARTS[0]:
+            granularity = SPIEngine.SECTOR_SIZE
+        else:
+            granularity = page_size
+        if index == 0:
+            ranges = [[0, len(data)]]
+        else:
+            ranges = self.batch.ranges(patches, granularity)
+
+        self.batch_unit = (index, values, zlib.crc32(data), ranges)
+        self.log(f"Programming unit {index + 1}: "
+                 + ", ".join(f"{name}={value}" for name, value in values.items()))
+
+        params = {
+            'port': self.port_combo.currentText(),
+            'speed': self.speed_combo.currentText(),
+            'address': address,
+            'page_size': page_size,
+            'data': data,
+            'ranges': ranges,
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked()
+        }
+
+        self.worker = self.create_worker('patch', params)
+        self.worker.operation_complete.connect(self.operation_finished)
+        self.worker.operation_complete.connect(self.batch_unit_finished)
+        self.worker.progress_updated.connect(self.update_progress)
+        self.worker.log_message.connect(self.log)
+
+        self.set_ui_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.worker.start()
+
+    def batch_unit_finished(self, success, message):
+        index, values, crc, ranges = self.batch_unit
+        self.batch_unit = None
+        if not success:
+            self.log(f"Unit {index + 1} failed, it will be programmed again with the same values")
+            return
+
+        self.batch.index = index + 1
+        written = sum(end - start for start, end in ranges)
+        self.log(f"Unit {index + 1} done: "
+                 + ", ".join(f"{name}={value}" for name, value in values.items())
+                 + f", {written} bytes written, CRC-32 {crc:08X}")
+        try:
+            with open(os.path.join(data_dir(), "batch.jsonl"), "a") as f:
+                f.write(json.dumps({
+                    'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                    'port': self.port_combo.currentText(),
+                    'unit': index + 1,
+                    'values': values,
+                    'crc32': f"{crc:08X}",
+                    'ranges': ranges,
+                }) + "\n")
+        except OSError as e:
+            self.log(f"Could not write batch log: {str(e)}")
+
+        remaining = self.batch.remaining
+        status = f"Unit {self.batch.index + 1} next"
+        if remaining is not None:
+            status += f" ({remaining} left)"
+        self.batch_status.setText(status)
+
+    def get_recipe_steps(self):
+        steps = [step.strip().lower() for step in self.recipe_edit.text().split(",") if step.strip()]
+        unknown = [step for step in steps if step not in I2CEngine.RECIPE_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown recipe step(s): {', '.join(unknown)}")
+        if not steps:
+            raise ValueError("Recipe is empty")
+        return steps
+
+    def run_recipe(self):
+        if not self.port_combo.currentText() or "No ports" in self.port_combo.currentText():
+            self.log("Error: No valid port selected!")
+            return
+
+        try:
+            steps = self.get_recipe_steps()
+        except ValueError as e:
+            self.log(f"Error: {str(e)}")
+            return
+
+        address = self.get_i2c_address()
+        data = self.hex_editor.get_data()
+        if not data and ('write' in steps or 'verify' in steps):
+            self.log("Error: No data to write!")
+            return
+
+        self.log(f"Starting recipe on {self.describe_target(address)}: {', '.join(steps)}")
+
+        params = {
+            'port': self.port_combo.currentText(),
+            'speed': self.speed_combo.currentText(),
+            'address': address,
+            'page_size': self.get_page_size(),
+            'size': self.get_eeprom_size(),
+            'data': data,
+            'steps': steps,
+            'power': self.power_check.isChecked(),
+            'pull-up': self.pullup_check.isChecked()
+        }
+
+        self.worker = self.create_worker('recipe', params)
+        self.worker.operation_complete.connect(self.operation_finished)
+        self.worker.data_ready.connect(self.eeprom_data_ready)
+        self.worker.progress_updated.connect(self.update_progress)
+        self.worker.log_message.connect(self.log)
+
+        self.set_ui_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.worker.start()
+
+    def load_recipe(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Load Recipe", "", "Recipe Files (*.json);;All Files (*)"
+        )
+
+        if file_path:
+            try:
+                with open(file_path, "r") as f:
+                    recipe = json.load(f)
+                self.recipe_edit.setText(", ".join(recipe['steps']))
+                self.get_recipe_steps()
+                self.log(f"Recipe loaded from {file_path}")
+            except Exception as e:
+                self.log(f"Recipe load error: {str(e)}")
+
+    def save_recipe(self):
+        try:
+            steps = self.get_recipe_steps()
+        except ValueError as e:
+            self.log(f"Error: {str(e)}")
+            return
+
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Recipe", "", "Recipe Files (*.json);;All Files (*)"
+        )
+
+        if file_path:
+            try:
+                with open(file_path, "w") as f:
+                    json.dump({'steps': steps}, f, indent=2)
+                self.log(f"Recipe saved to {file_path}")
+            except Exception as e:
+                self.log(f"Recipe save error: {str(e)}")
+
+    def cancel_operation(self):
+        if self.worker and self.worker.isRunning():
+            self.log("Cancelling operation...")
+            self.cancel_btn.setEnabled(False)
+            self.worker.stop()
     
     def save_to_file(self):
         data = self.hex_editor.get_data()
@@ -1003,25 +3990,44 @@ class EEPROMProgrammer(QMainWindow):
             return
             
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save EEPROM Data", "", "Binary Files (*.bin);;All Files (*)"
+            self, "Save EEPROM Data", "", "Binary Files (*.bin);;Dump Archives (*.bpa);;All Files (*)"
         )
         
         if file_path:
             try:
+                if file_path.lower().endswith(".bpa"):
+                    self.save_to_archive(file_path, data)
+                    return
                 with open(file_path, "wb") as f:
                     f.write(data)
                 self.log(f"Data saved to {file_path}")
                 self.status_bar.showMessage(f"Saved to {file_path}")
             except Exception as e:
                 self.log(f"Save error: {str(e)}")
+
+    def save_to_archive(self, file_path, data):
+        protocol = self.protocol_combo.currentText()
+        archive = DumpArchive(file_path)
+        dump, stored = archive.add(
+            data,
+            device=f"{protocol} {self.part_combo.currentText()}" if protocol == "SPI" else "I2C EEPROM",
+            port=self.port_combo.currentText(),
+            address=self.get_i2c_address() if protocol == "I2C" else None,
+            page_size=self.get_page_size()
+        )
+        self.log(f"Dump #{dump['id']} added to {file_path}: {len(data)} bytes, {stored} new bytes stored")
+        self.status_bar.showMessage(f"Saved dump #{dump['id']} to {file_path}")
     
     def load_from_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Load EEPROM Data", "", "Binary Files (*.bin);;All Files (*)"
+            self, "Load EEPROM Data", "", "Binary Files (*.bin);;Dump Archives (*.bpa);;All Files (*)"
         )
         
         if file_path:
             try:
+                if file_path.lower().endswith(".bpa"):
+                    self.load_from_archive(file_path)
+                    return
                 with open(file_path, "rb") as f:
                     data = f.read()
                 self.hex_editor.load_data(data)
@@ -1031,13 +4037,40 @@ class EEPROMProgrammer(QMainWindow):
                 self.tab_widget.setCurrentIndex(1)
             except Exception as e:
                 self.log(f"Load error: {str(e)}")
+
+    def load_from_archive(self, file_path):
+        archive = DumpArchive(file_path)
+        if not archive.dumps:
+            self.log(f"Archive {file_path} contains no dumps")
+            return
+        dumps = list(reversed(archive.dumps))
+        choice, ok = QInputDialog.getItem(self, "Load Dump", "Dump:",
+                                          [archive.describe(dump) for dump in dumps], 0, False)
+        if not ok:
+            return
+        dump_id = int(choice.split()[0][1:])
+        dump, data = archive.load(dump_id)
+        self.hex_editor.load_data(data)
+        self.current_file = file_path
+        if dump.get('page_size'):
+            self.page_size_edit.setText(str(dump['page_size']))
+        self.log(f"Dump #{dump_id} loaded from {file_path}: {len(data)} bytes, SHA-256 {dump['sha256']}")
+        self.status_bar.showMessage(f"Loaded dump #{dump_id} ({len(data)} bytes) from {file_path}")
+        self.tab_widget.setCurrentIndex(1)
     
     def eeprom_data_ready(self, data):
-        self.hex_editor.load_data(data)
+        with TRACER.span("data_ready", size=len(data)):
+            self.hex_editor.load_data(data)
         self.log(f"EEPROM data loaded: {len(data)} bytes")
         self.status_bar.showMessage(f"Read {len(data)} bytes from EEPROM")
         self.tab_widget.setCurrentIndex(1)
     
+    def compare_data_ready(self, data):
+        port = self.port_combo.currentText()
+        self.hex_editor.compare_with(data, f"device on {port}")
+        self.log(f"Compared editor with {len(data)} bytes read from device")
+        self.tab_widget.setCurrentIndex(1)
+    
     def operation_finished(self, success, message):
         self.set_ui_enabled(True)
         self.progress_bar.setVisible(False)
@@ -1054,32 +4087,229 @@ class EEPROMProgrammer(QMainWindow):
     
     def set_ui_enabled(self, enabled):
         self.port_combo.setEnabled(enabled)
+        self.protocol_combo.setEnabled(enabled)
         self.speed_combo.setEnabled(enabled)
         self.address_edit.setEnabled(enabled)
+        self.part_combo.setEnabled(enabled)
+        self.erase_mode_combo.setEnabled(enabled)
+        self.identify_btn.setEnabled(enabled)
         self.size_combo.setEnabled(enabled)
         self.custom_size_edit.setEnabled(enabled)
         self.page_size_edit.setEnabled(enabled)
         self.read_btn.setEnabled(enabled)
         self.write_btn.setEnabled(enabled)
         self.erase_btn.setEnabled(enabled)
+        self.verify_btn.setEnabled(enabled)
+        self.run_recipe_btn.setEnabled(enabled)
+        self.load_recipe_btn.setEnabled(enabled)
+        self.recipe_edit.setEnabled(enabled)
+        self.batch_fields_edit.setEnabled(enabled)
+        self.load_csv_btn.setEnabled(enabled)
+        self.next_unit_btn.setEnabled(enabled)
+        self.reset_batch_btn.setEnabled(enabled)
+        self.cancel_btn.setEnabled(not enabled)
         self.save_btn.setEnabled(enabled)
         self.load_btn.setEnabled(enabled)
-        self.hex_editor.setEnabled(enabled)
+        if self._hex_editor is not None:
+            self._hex_editor.setEnabled(enabled)
     
+    def toggle_profiling(self, enabled):
+        if enabled:
+            if not TRACER.enabled:
+                TRACER.start()
+            self.log("Profiling started")
+            return
+        try:
+            path = TRACER.stop()
+            self.log(f"Profile written to {path}")
+        except OSError as e:
+            self.log(f"Could not write profile: {str(e)}")
+
     def closeEvent(self, event):
+        self.port_watcher.stop()
+        self.port_watcher.wait(2000)
         if self.worker and self.worker.isRunning():
             self.worker.stop()
             self.worker.wait(2000)
         event.accept()
 
+class TraceSpan:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.add(self.name, self.begin, time.perf_counter(), self.args)
+        return False
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.path = None
+        self.null_span = NullSpan()
+
+    def start(self, path=None):
+        import cProfile
+        self.path = path
+        self.events = []
+        self.threads = {}
+        self.profiler = cProfile.Profile()
+        try:
+            self.profiler.enable()
+        except ValueError:
+            self.profiler = None
+        self.enabled = True
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return self.null_span
+        return TraceSpan(self, name, args)
+
+    def add(self, name, begin, end, args):
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': round((begin - STARTUP_BEGIN) * 1e6, 1),
+            'dur': round((end - begin) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+            self.threads[thread.ident] = thread.name
+
+    def stop(self):
+        self.enabled = False
+        if self.profiler:
+            self.profiler.disable()
+        path = self.path
+        if not path:
+            directory = os.path.join(data_dir(), "profiles")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        with self.lock:
+            events = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident, 'args': {'name': name}}
+                      for ident, name in self.threads.items()] + self.events
+        with open(path, "w") as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+        import pstats
+        with open(os.path.splitext(path)[0] + ".txt", "w") as f:
+            f.write("Span totals:\n")
+            totals = {}
+            for event in self.events:
+                count, duration = totals.get(event['name'], (0, 0.0))
+                totals[event['name']] = (count + 1, duration + event['dur'])
+            for name, (count, duration) in sorted(totals.items(), key=lambda item: -item[1][1]):
+                f.write(f"  {name:<16} {count:6d} x  {duration / 1000:10.1f} ms\n")
+            if self.profiler:
+                f.write("\nGUI thread functions by cumulative time:\n")
+                pstats.Stats(self.profiler, stream=f).sort_stats("cumulative").print_stats(30)
+        return path
+
+TRACER = Tracer()
+
+class StartupProfile:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.marks = [("interpreter start", STARTUP_BEGIN)]
+        self.profiler = None
+        if enabled:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def mark(self, name):
+        if self.enabled:
+            self.marks.append((name, time.perf_counter()))
+
+    def report(self, stream=sys.stderr):
+        if not self.enabled:
+            return
+        self.profiler.disable()
+        begin = self.marks[0][1]
+        previous = begin
+        stream.write("Startup profile:\n")
+        for name, stamp in self.marks[1:]:
+            stream.write(f"  {name:<24} +{(stamp - previous) * 1000:8.1f} ms  {(stamp - begin) * 1000:8.1f} ms\n")
+            previous = stamp
+
+        import pstats
+        stream.write("\nTop functions by cumulative time after imports:\n")
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+        stream.flush()
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Bus Pirate EEPROM programmer")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print where startup time goes and keep running")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run the headless programming daemon instead of the GUI")
+    parser.add_argument("--listen", default=None,
+                        help="daemon socket path or host:port (default: ~/.bp_programmer/daemon.sock, "
+                             "or 127.0.0.1:8765 on Windows)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="let the daemon listen on a non-loopback host:port (anyone who can reach it "
+                             "can erase and program parts)")
+    parser.add_argument("--attach", nargs="?", const="", default=None,
+                        help="run GUI operations through the daemon at this address")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE",
+                        help="record timing spans and a profile, written as Chrome-trace JSON on exit "
+                             "(default: ~/.bp_programmer/profiles/trace-<time>.json)")
+    return parser.parse_known_args(argv[1:])
+
 if __name__ == "__main__":
+    args, qt_args = parse_arguments(sys.argv)
+    if args.daemon:
+        try:
+            asyncio.run(ProgrammingDaemon(args.listen or default_daemon_address(), allow_remote=args.allow_remote).serve())
+        except KeyboardInterrupt:
+            pass
+        except ValueError as e:
+            sys.exit(f"Error: {str(e)}")
+        sys.exit(0)
+
+    startup = StartupProfile(args.startup_profile)
+    startup.mark("imports")
+    if args.profile is not None:
+        TRACER.start(args.profile or None)
+
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
+    startup.mark("QApplication")
 
     font = QFont("Segoe UI", 10)
     app.setFont(font)
     
-    window = EEPROMProgrammer()
+    daemon_address = None
+    if args.attach is not None:
+        daemon_address = args.attach or default_daemon_address()
+    window = EEPROMProgrammer(daemon_address)
+    startup.mark("main window built")
+    window.profile_action.setChecked(TRACER.enabled)
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    startup.mark("window shown")
+    QtCore.QTimer.singleShot(0, lambda: (startup.mark("first paint"), startup.report()))
+    status = app.exec_()
+    if TRACER.enabled:
+        print(f"Profile written to {TRACER.stop()}", file=sys.stderr)
+    sys.exit(status)
\ No newline at end of file